@@ -0,0 +1,73 @@
+"""Checkout benchmark: round trips and latency of Purchase.create_purchase
+
+Creates a set of benchmark products, then times create_purchase for several
+basket sizes and counts the statements each checkout sends to MySQL (read
+from the session's Questions counter).
+
+Usage:
+    python benchmarks/bench_checkout.py [--sizes 1 5 20 50] [--runs 20]
+
+Connection settings default to the DB_* keys in .env. A separate database
+(<DB_NAME>_bench by default) is used so real data is never touched.
+"""
+import statistics
+import sys
+import time
+
+from common import connection_parser  # also puts the repository root on sys.path
+
+from inventory_manager import Database, Product, Purchase
+
+
+def questions(db):
+    """Number of statements the server has received on this session"""
+    db.cursor.execute("SHOW SESSION STATUS LIKE 'Questions'")
+    return int(db.cursor.fetchone()[1])
+
+
+def main():
+    parser = connection_parser(__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    db = Database(args.host, args.user, args.password, args.database)
+    if db.connection is None:
+        sys.exit(1)
+    product_model = Product(db)
+    purchase_model = Purchase(db)
+
+    product_ids = []
+    for i in range(max(args.sizes)):
+        name = f"bench-item-{i}"
+        existing = product_model.get_product_by_name(name)
+        if existing:
+            product_ids.append(existing[0])
+        else:
+            product_ids.append(product_model.add_product(name, 9.99, 10 ** 9, "Benchmark"))
+
+    # Statements used by the counter query itself
+    first = questions(db)
+    overhead = questions(db) - first
+
+    print(f"\n{'basket':>6} {'round trips':>12} {'p50 ms':>9} {'mean ms':>9} {'max ms':>9}")
+    for size in args.sizes:
+        basket = [(product_id, 1) for product_id in product_ids[:size]]
+        timings = []
+        trips = None
+        for _ in range(args.runs):
+            before = questions(db)
+            start = time.perf_counter()
+            success, _, _ = purchase_model.create_purchase(None, basket)
+            timings.append((time.perf_counter() - start) * 1000)
+            trips = questions(db) - before - overhead
+            if not success:
+                sys.exit(f"Checkout failed for basket size {size}")
+        print(f"{size:>6} {trips:>12} {statistics.median(timings):>9.2f} "
+              f"{statistics.mean(timings):>9.2f} {max(timings):>9.2f}")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Prepared statement benchmark: text protocol vs server-side prepared statements
+
+Runs the hot single-row statements the models issue (primary key lookups
+and conditional stock updates) through two Database instances, one with
+prepared=True, and reports throughput and latency for each mode.
+
+Usage:
+    python benchmarks/bench_prepared.py [--iterations 2000]
+
+Connection settings default to the DB_* keys in .env. A separate database
+(<DB_NAME>_bench by default) is used so real data is never touched.
+"""
+import statistics
+import sys
+import time
+
+from common import connection_parser  # also puts the repository root on sys.path
+
+from inventory_manager import Database, Product
+
+
+def timed(operation, iterations):
+    """Run operation(i) iterations times and return per-call latencies in ms"""
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = connection_parser(__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"\n{'mode':<9} {'statement':<18} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for prepared in (False, True):
+        db = Database(args.host, args.user, args.password, args.database, prepared=prepared)
+        if db.connection is None:
+            sys.exit(1)
+        # No cache, so every lookup reaches the database
+        product_model = Product(db, cache_size=0)
+
+        product_ids = []
+        for i in range(args.products):
+            name = f"bench-item-{i}"
+            existing = product_model.get_product_by_name(name)
+            product_ids.append(existing[0] if existing else
+                               product_model.add_product(name, 9.99, 10 ** 9, "Benchmark"))
+
+        workloads = {
+            'lookup by id': lambda i: product_model.get_product_by_id(product_ids[i % len(product_ids)]),
+            'stock update': lambda i: product_model.update_quantity(product_ids[i % len(product_ids)],
+                                                                    1 if i % 2 else -1),
+        }
+        mode = "prepared" if prepared else "text"
+        for name, operation in workloads.items():
+            timings = sorted(timed(operation, args.iterations))
+            p99 = timings[int(len(timings) * 0.99) - 1]
+            print(f"{mode:<9} {name:<18} {1000 / statistics.mean(timings):>9.0f} "
+                  f"{statistics.median(timings):>8.3f} {p99:>8.3f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Startup benchmark: import time of inventory_manager against a budget
+
+Imports the module in fresh interpreters under python -X importtime and
+reports the median cumulative import time, plus the wall time of a full
+`inventory_manager.py --help` run. Exits with status 1 if the import is
+over budget or pulls in a third-party package (which should only be
+imported when an operation needs it), so it can gate CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 50]
+
+No database is needed.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "inventory_manager.py")
+
+# Top-level packages that must not be loaded by importing the module
+LAZY = ("git", "gitdb", "mysql", "tabulate", "sqlite3", "argparse")
+
+
+def import_profile():
+    """Import inventory_manager in a fresh interpreter
+
+    Returns:
+        tuple: (cumulative import time in ms, set of top-level packages imported)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import inventory_manager"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = None
+    packages = set()
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        name = fields[2].strip()
+        packages.add(name.split(".")[0])
+        if name == "inventory_manager":
+            total = int(fields[1]) / 1000
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="maximum median cumulative import time")
+    args = parser.parse_args()
+
+    timings = []
+    loaded = set()
+    for _ in range(args.runs):
+        total, packages = import_profile()
+        timings.append(total)
+        loaded |= packages & set(LAZY)
+
+    cli_timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, "--help"], cwd=ROOT, capture_output=True, check=True)
+        cli_timings.append((time.perf_counter() - start) * 1000)
+
+    import_ms = statistics.median(timings)
+    print(f"import inventory_manager: median {import_ms:.1f} ms, max {max(timings):.1f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    print(f"inventory_manager.py --help: median {statistics.median(cli_timings):.1f} ms wall time")
+
+    failed = False
+    if loaded:
+        print("FAIL: imported eagerly: " + ", ".join(sorted(loaded)))
+        failed = True
+    if import_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""Helpers shared by the benchmark scripts"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from inventory_manager import read_env  # noqa: E402
+
+
+def connection_parser(description):
+    """Argument parser with MySQL connection options defaulting to .env"""
+    env = read_env(os.path.join(ROOT, ".env"))
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--host", default=env.get("DB_HOST", "localhost"))
+    parser.add_argument("--user", default=env.get("DB_USER", "root"))
+    parser.add_argument("--password", default=env.get("DB_PASSWORD", ""))
+    parser.add_argument("--database", default=env.get("DB_NAME", "inventory_management") + "_bench")
+    return parser
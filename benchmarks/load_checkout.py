@@ -0,0 +1,121 @@
+"""Checkout load test against a running API server (inventory_manager.py serve)
+
+Creates a set of benchmark products through the API (reusing them on later
+runs), then has --concurrency client threads post random baskets to
+/purchases over keep-alive connections until --requests checkouts are
+done. Reports throughput and the p50/p90/p99 checkout latency, plus the
+server's pool and git writer counters.
+
+Usage:
+    python inventory_manager.py serve --backend sqlite --database bench.db &
+    python benchmarks/load_checkout.py [--url http://127.0.0.1:8080] [--concurrency 16]
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class Client:
+    """JSON client on one persistent HTTP connection"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+
+
+def percentile(timings, fraction):
+    """Nearest-rank percentile of sorted timings"""
+    return timings[max(int(len(timings) * fraction + 0.5) - 1, 0)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads")
+    parser.add_argument("--requests", type=int, default=2000, help="checkouts in total")
+    parser.add_argument("--basket", type=int, default=3, help="products per checkout")
+    parser.add_argument("--products", type=int, default=50, help="distinct products to buy from")
+    args = parser.parse_args()
+
+    client = Client(args.url)
+    product_ids = []
+    for i in range(args.products):
+        status, product = client.request("POST", "/products", {
+            'name': f"load-item-{i}", 'price': 4.99, 'quantity': 10 ** 9, 'category': "Benchmark"})
+        if status not in (201, 409):
+            print(f"Could not create benchmark products: {status} {product}")
+            return 1
+        product_ids.append(product['id'])
+
+    remaining = [args.requests]
+    lock = threading.Lock()
+    timings = []
+    errors = {}
+
+    def worker():
+        session = Client(args.url)
+        rng = random.Random()
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            basket = [{'product_id': product_id, 'quantity': rng.randint(1, 3)}
+                      for product_id in rng.sample(product_ids, min(args.basket, len(product_ids)))]
+            start = time.perf_counter()
+            try:
+                status, _ = session.request("POST", "/purchases", {'items': basket})
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                session = Client(args.url)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if status == 201:
+                    timings.append(elapsed)
+                else:
+                    errors[status] = errors.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    if not timings:
+        print(f"No checkout succeeded; errors: {errors}")
+        return 1
+    timings.sort()
+    print(f"\n{len(timings)} checkouts of {args.basket} products, {args.concurrency} concurrent clients, "
+          f"{seconds:.1f}s: {len(timings) / seconds:.0f} checkouts/s")
+    print(f"latency ms: p50 {percentile(timings, 0.50):.1f}  p90 {percentile(timings, 0.90):.1f}  "
+          f"p99 {percentile(timings, 0.99):.1f}  max {timings[-1]:.1f}  mean {statistics.mean(timings):.1f}")
+    if errors:
+        print(f"errors: {errors}")
+
+    status, stats = client.request("GET", "/stats")
+    if status == 200:
+        pool, writer = stats['pool'], stats['git_writer']
+        if pool:
+            print(f"pool: {pool['size']} connections, {pool['waits']} waits, {pool['timeouts']} timeouts")
+        print(f"git writer: {writer['recorded']} recorded, queue depth {writer['queue_depth']}, "
+              f"average lag {writer['avg_lag']:.2f}s")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
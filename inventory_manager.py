@@ -1,59 +1,603 @@
+import csv
+import importlib
+import json
 import os
+import queue
+import random
+import re
 import sys
 import time
-from datetime import datetime
-from tabulate import tabulate
-
-# Check if required packages are installed, if not install them
-try:
-    import git
-    import mysql.connector
-except ImportError:
-    print("Installing required packages...")
-    import subprocess
-    packages = ["gitpython", "tabulate", "mysql-connector-python"]
-    for package in packages:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-    import git
-    import mysql.connector
-    from tabulate import tabulate
+import threading
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import islice
+
+# Third-party packages are imported on first use, so a command only loads
+# the libraries it actually needs
+REQUIREMENTS = {
+    'git': 'gitpython',
+    'mysql.connector': 'mysql-connector-python',
+    'tabulate': 'tabulate',
+}
+
+
+class MissingDependencyError(ImportError):
+    """A third-party package needed for the requested operation is not installed"""
+
+
+def require(module):
+    """Import a third-party module, explaining how to install it if it is missing"""
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise MissingDependencyError(
+            f"{module} is required for this operation; install it with: pip install {REQUIREMENTS[module]}"
+        ) from e
+
+
+def tabulate(*args, **kwargs):
+    """tabulate.tabulate, imported on first use"""
+    return require('tabulate').tabulate(*args, **kwargs)
+
+# Connection pool
+class PoolError(Exception):
+    """Raised when a connection cannot be borrowed from the pool"""
+
+
+class PoolTimeoutError(PoolError):
+    """Raised when no connection became free within the checkout timeout"""
+
+
+class ConnectionPool:
+    def __init__(self, factory, min_size=1, max_size=5, timeout=30.0, health_check=None):
+        """Keep between min_size and max_size connections created by factory
+
+        Args:
+            factory (callable): Returns a new open connection
+            min_size (int): Connections opened up front and kept idle
+            max_size (int): Upper bound on open connections
+            timeout (float): Seconds to wait for a free connection before giving up
+            health_check (callable): Returns True if a borrowed connection is usable
+        """
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check or (lambda connection: connection.is_connected())
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._available = threading.Condition()
+        self._stats = {
+            'created': 0,
+            'borrowed': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+        }
+        
+        for _ in range(min_size):
+            self._size += 1
+            self._idle.append(self._create())
+    
+    def _create(self):
+        """Open a new connection in a slot already counted in _size, releasing it on failure"""
+        try:
+            connection = self.factory()
+        except Exception:
+            with self._available:
+                self._size -= 1
+                self._available.notify()
+            raise
+        with self._available:
+            self._stats['created'] += 1
+        return connection
+    
+    def _is_healthy(self, connection):
+        """Run the health check, treating any exception as a failure"""
+        try:
+            return bool(self.health_check(connection))
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _close(connection):
+        """Close a connection, ignoring errors from one that is already broken"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    def _discard(self, connection):
+        """Close a connection and free its slot"""
+        self._close(connection)
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+    
+    def acquire(self):
+        """Borrow a healthy connection, waiting up to the checkout timeout"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        
+        with self._available:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Claim the slot now; counting it only once the connection
+                    # is open would let other threads past this check meanwhile
+                    self._size += 1
+                    connection = None
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"No connection available within {self.timeout}s "
+                        f"({self.max_size} in use)"
+                    )
+                waited = True
+                self._available.wait(remaining)
+            
+            self._stats['borrowed'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_time'] += time.monotonic() - start
+        
+        if connection is not None and not self._is_healthy(connection):
+            with self._available:
+                self._stats['health_check_failures'] += 1
+            # The replacement reuses the broken connection's slot
+            self._close(connection)
+            connection = None
+        
+        if connection is None:
+            connection = self._create()
+        return connection
+    
+    def release(self, connection, discard=False):
+        """Return a borrowed connection, closing it if discard is set"""
+        if discard or self._closed:
+            self._discard(connection)
+            return
+        with self._available:
+            self._idle.append(connection)
+            self._available.notify()
+    
+    def stats(self):
+        """Get a snapshot of pool size and usage counters"""
+        with self._available:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['min_size'] = self.min_size
+            stats['max_size'] = self.max_size
+        return stats
+    
+    def close(self):
+        """Close all idle connections; borrowed ones are closed on release"""
+        with self._available:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for connection in idle:
+            self._discard(connection)
+
+# Storage backends
+class MySQLBackend:
+    """MySQL server storage through mysql.connector"""
+    name = "MySQL"
+    # Row locks for read-modify-write transactions
+    lock_rows = " FOR UPDATE"
+    supports_prepared = True
+    # A multi-row INSERT is already a single atomic statement
+    wrap_batches = False
+    
+    def __init__(self):
+        self.connector = require('mysql.connector')
+        self.Error = self.connector.Error
+    
+    def bootstrap(self, db):
+        """Connect to the server and create the application database if needed"""
+        connection = self.connector.connect(
+            host=db.host,
+            user=db.user,
+            password=db.password
+        )
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db.database}")
+        cursor.execute(f"USE {db.database}")
+        cursor.close()
+        return connection
+    
+    def connect(self, db):
+        """Open a pooled connection to the application database"""
+        # Autocommit keeps plain reads from pinning a stale snapshot on a reused connection
+        return self.connector.connect(
+            host=db.host,
+            user=db.user,
+            password=db.password,
+            database=db.database,
+            autocommit=True
+        )
+    
+    def translate(self, query):
+        """Queries are written in MySQL's dialect and %s paramstyle already"""
+        return query
+    
+    def ddl(self, query):
+        """Table definitions are written for MySQL already"""
+        return query
+    
+    def cursor(self, connection, buffered=True):
+        """Open a cursor; unbuffered cursors stream rows from the server"""
+        return connection.cursor(buffered=buffered)
+    
+    def begin(self, connection):
+        """Start an explicit transaction"""
+        connection.start_transaction()
+    
+    def has_unread(self, connection):
+        """Whether a streamed result is still waiting to be read"""
+        return connection.unread_result
+    
+    def drain(self, connection):
+        """Read and discard the rest of a streamed result"""
+        connection.consume_results()
+    
+    def is_healthy(self, connection):
+        """Pool health check"""
+        return connection.is_connected()
+    
+    def upsert_clause(self, conflict_column, columns, touch=None, keep_if_null=()):
+        """Clause turning an INSERT into an upsert on a unique column
+        
+        Args:
+            conflict_column (str): Unique column that identifies existing rows
+            columns (list): Columns overwritten with the new values; none means keep the existing row
+            touch (str): Timestamp column set to CURRENT_TIMESTAMP on update
+            keep_if_null (tuple): Columns that keep their existing value when the new one is NULL
+        """
+        if not columns:
+            return "ON DUPLICATE KEY UPDATE id = id"
+        assignments = [f"{column} = COALESCE(VALUES({column}), {column})" if column in keep_if_null
+                       else f"{column} = VALUES({column})" for column in columns]
+        if touch:
+            assignments.append(f"{touch} = CURRENT_TIMESTAMP")
+        return "ON DUPLICATE KEY UPDATE " + ", ".join(assignments)
+    
+    def has_index(self, cursor, table, column, unique=False):
+        """Check whether an index starting with column exists on table"""
+        query = """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        AND column_name = %s AND seq_in_index = 1
+        """
+        if unique:
+            query += " AND non_unique = 0"
+        cursor.execute(query, (table, column))
+        return cursor.fetchone()[0] > 0
+    
+    def add_index(self, cursor, table, index_name, column, unique=False):
+        """Add an index without blocking reads or writes"""
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        # In-place DDL lets the store keep trading while the index builds
+        cursor.execute(f"ALTER TABLE {table} ADD {kind} {index_name} ({column}), ALGORITHM=INPLACE, LOCK=NONE")
+
+
+class SQLiteBackend:
+    """Embedded, in-process storage in a single SQLite file"""
+    name = "SQLite"
+    # BEGIN IMMEDIATE takes the write lock up front instead
+    lock_rows = ""
+    # sqlite3 already caches compiled statements per connection
+    supports_prepared = False
+    # Without an explicit transaction every row of a batch would commit on its own
+    wrap_batches = True
+    
+    PRAGMAS = [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA foreign_keys = ON",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA cache_size = -20000",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA mmap_size = 268435456",
+    ]
+    PARAM = re.compile(r"%s")
+    MAX_TRANSLATED = 1024
+    
+    def __init__(self):
+        import sqlite3
+        self.sqlite3 = sqlite3
+        self.Error = sqlite3.Error
+        self._translated = {}
+    
+    def path(self, db):
+        """Database file for db.database, adding .db when it has no extension"""
+        if db.database == ":memory:" or os.path.splitext(db.database)[1]:
+            return db.database
+        return db.database + ".db"
+    
+    def connect(self, db):
+        """Open a connection with the tuned pragmas applied"""
+        # isolation_level=None: autocommit, with explicit BEGIN for transactions
+        connection = self.sqlite3.connect(self.path(db), isolation_level=None, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            connection.execute(pragma)
+        return connection
+    
+    def bootstrap(self, db):
+        """The file is created on first connect"""
+        return self.connect(db)
+    
+    def translate(self, query):
+        """Convert the %s paramstyle to SQLite's ?"""
+        translated = self._translated.get(query)
+        if translated is None:
+            # IN lists make some queries unique per call, so keep the cache bounded
+            if len(self._translated) >= self.MAX_TRANSLATED:
+                self._translated.clear()
+            translated = self._translated[query] = self.PARAM.sub("?", query)
+        return translated
+    
+    def ddl(self, query):
+        """Adapt a MySQL table definition to SQLite"""
+        query = query.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+        return query.replace(" ON UPDATE CURRENT_TIMESTAMP", "")
+    
+    def cursor(self, connection, buffered=True):
+        """SQLite cursors always step through results lazily"""
+        return connection.cursor()
+    
+    def begin(self, connection):
+        """Start a transaction holding the write lock"""
+        connection.execute("BEGIN IMMEDIATE")
+    
+    def has_unread(self, connection):
+        """Unfinished SQLite cursors don't block other statements"""
+        return False
+    
+    def drain(self, connection):
+        """Nothing to drain"""
+    
+    def is_healthy(self, connection):
+        """Pool health check"""
+        connection.execute("SELECT 1")
+        return True
+    
+    def upsert_clause(self, conflict_column, columns, touch=None, keep_if_null=()):
+        """Clause turning an INSERT into an upsert on a unique column
+        
+        Args:
+            conflict_column (str): Unique column that identifies existing rows
+            columns (list): Columns overwritten with the new values; none means keep the existing row
+            touch (str): Timestamp column set to CURRENT_TIMESTAMP on update
+            keep_if_null (tuple): Columns that keep their existing value when the new one is NULL
+        """
+        if not columns:
+            return f"ON CONFLICT({conflict_column}) DO NOTHING"
+        assignments = [f"{column} = COALESCE(excluded.{column}, {column})" if column in keep_if_null
+                       else f"{column} = excluded.{column}" for column in columns]
+        if touch:
+            assignments.append(f"{touch} = CURRENT_TIMESTAMP")
+        return f"ON CONFLICT({conflict_column}) DO UPDATE SET " + ", ".join(assignments)
+    
+    def has_index(self, cursor, table, column, unique=False):
+        """Check whether an index starting with column exists on table"""
+        cursor.execute(f"PRAGMA index_list({table})")
+        for index in cursor.fetchall():
+            index_name, is_unique = index[1], index[2]
+            if unique and not is_unique:
+                continue
+            cursor.execute(f"PRAGMA index_info({index_name})")
+            columns = cursor.fetchall()
+            if columns and columns[0][2] == column:
+                return True
+        return False
+    
+    def add_index(self, cursor, table, index_name, column, unique=False):
+        """Add an index"""
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        cursor.execute(f"CREATE {kind} IF NOT EXISTS {index_name} ON {table} ({column})")
+
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
 
 # Database setup
 class Database:
-    def __init__(self, host="localhost", user="root", password="", database="inventory_management"):
-        self.host = host
+    # Prepared statements kept per connection before the least recently used is closed
+    MAX_PREPARED_STATEMENTS = 64
+    
+    # Schema changes applied on top of _create_tables, in order, once per
+    # database: (version, description, method name)
+    MIGRATIONS = [
+        (1, "Add indexes for hot lookup columns", "_migrate_lookup_indexes"),
+        (2, "Add reservations table for cart holds", "_migrate_reservations"),
+        (3, "Count cart holds against stock instead of deducting them", "_migrate_holds_on_hand"),
+    ]
+    
+    def __init__(self, host="localhost", user="root", password="", database="inventory_management",
+                 pool_min_size=None, pool_max_size=None, pool_timeout=30.0, prepared=False, backend="mysql"):
+        """Connect to the database
+
+        backend selects the storage engine: 'mysql' (a MySQL server) or
+        'sqlite' (an embedded file; database is then its path, with .db added
+        when it has no extension, and host, user and password are unused).
+        Queries are written for MySQL with %s placeholders and translated.
+        
+        Pass pool_max_size to run in pooled mode, where every query borrows its own
+        connection from a ConnectionPool instead of sharing one connection and cursor.
+        
+        With prepared=True, single statements run as server-side prepared
+        statements that each connection prepares once per SQL text and then
+        reuses, so MySQL skips parsing them again.
+        """
         self.host = host
         self.user = user
         self.password = password
         self.database = database
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_timeout = pool_timeout
+        self.prepared = prepared
+        self.backend = BACKENDS[backend]()
+        # Exceptions every query method catches and reports
+        self.errors = (self.backend.Error, PoolError)
         self.connection = None
         self.cursor = None
+        self.pool = None
         self.connect()
         
     def connect(self):
-        """Connect to MySQL database"""
+        """Connect to the database, creating it and its tables if needed"""
         try:
-            # First connect without database to create it if needed
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password
-            )
-            self.cursor = self.connection.cursor()
-            
-            # Create database if it doesn't exist
-            self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
-            self.cursor.execute(f"USE {self.database}")
+            self.connection = self.backend.bootstrap(self)
+            # Buffered, so a fetchone never leaves unread rows blocking the next query
+            self.cursor = self.backend.cursor(self.connection)
             
-            # Create tables if they don't exist
+            # Create tables if they don't exist, then bring the schema up to date
             self._create_tables()
+            self.migrate()
             
-            print(f"Connected to MySQL database: {self.database}")
+            if self.pool_max_size:
+                # The bootstrap connection is only needed for schema setup
+                self.cursor.close()
+                self.connection.close()
+                self.cursor = None
+                self.connection = None
+                self.pool = ConnectionPool(
+                    self._new_connection,
+                    min_size=self.pool_min_size or 0,
+                    max_size=self.pool_max_size,
+                    timeout=self.pool_timeout,
+                    health_check=self.backend.is_healthy
+                )
+                print(f"Connected to {self.backend.name} database: {self.database} "
+                      f"(pool of up to {self.pool_max_size})")
+            else:
+                print(f"Connected to {self.backend.name} database: {self.database}")
             return True
-        except mysql.connector.Error as e:
-            print(f"Error connecting to MySQL: {e}")
+        except self.backend.Error as e:
+            print(f"Error connecting to {self.backend.name}: {e}")
             return False
     
+    def _new_connection(self):
+        """Open a pooled connection to the application database"""
+        return self.backend.connect(self)
+    
+    def sql(self, query):
+        """Translate a query written for MySQL into the backend's dialect"""
+        return self.backend.translate(query)
+    
+    @contextmanager
+    def _borrow(self, buffered=True):
+        """Yield a (connection, cursor) pair, borrowed from the pool in pooled mode
+
+        With buffered=False the cursor streams rows from the server as they are
+        fetched instead of reading the whole result up front.
+        """
+        if self.pool is None:
+            if buffered:
+                yield self.connection, self.cursor
+                return
+            cursor = self.backend.cursor(self.connection, buffered=False)
+            try:
+                yield self.connection, cursor
+            finally:
+                # The shared connection must be drained before it can be reused
+                if self.backend.has_unread(self.connection):
+                    self.backend.drain(self.connection)
+                cursor.close()
+            return
+        
+        connection = self.pool.acquire()
+        cursor = None
+        discard = False
+        try:
+            cursor = self.backend.cursor(connection, buffered=buffered)
+            yield connection, cursor
+        finally:
+            try:
+                if self.backend.has_unread(connection):
+                    # Cheaper to drop an abandoned stream than to read it to the end
+                    discard = True
+                else:
+                    if cursor is not None:
+                        cursor.close()
+                    if connection.in_transaction:
+                        connection.rollback()
+            except self.backend.Error:
+                discard = True
+            self.pool.release(connection, discard=discard)
+    
+    @contextmanager
+    def transaction(self):
+        """Run several statements atomically on one connection
+
+        Yields a cursor. Commits when the block finishes and rolls back if it raises.
+        """
+        with self._borrow() as (connection, cursor):
+            if connection.in_transaction:
+                # End any implicit read transaction left on the shared connection
+                connection.rollback()
+            self.backend.begin(connection)
+            try:
+                yield cursor
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+    
+    def _statement(self, connection, cursor, query):
+        """Get the (query, cursor) pair to execute query with
+        
+        In prepared mode this is the connection's prepared cursor for the SQL
+        text, created on first use. The registry's own copy of the text is
+        returned because the connector only reuses a prepared statement when
+        it is given the identical string object.
+        """
+        if not (self.prepared and self.backend.supports_prepared):
+            return query, cursor
+        
+        statements = getattr(connection, "_inventory_statements", None)
+        if statements is None:
+            statements = OrderedDict()
+            connection._inventory_statements = statements
+        
+        entry = statements.get(query)
+        if entry is None:
+            entry = (query, connection.cursor(prepared=True))
+            statements[query] = entry
+            if len(statements) > self.MAX_PREPARED_STATEMENTS:
+                # Deallocate the least recently used statement on the server
+                statements.popitem(last=False)[1][1].close()
+        else:
+            statements.move_to_end(query)
+        return entry
+    
+    def pool_stats(self):
+        """Get connection pool statistics, or None when not pooled"""
+        return self.pool.stats() if self.pool else None
+    
     def _create_tables(self):
         """Create necessary tables if they don't exist"""
         tables = {}
@@ -62,7 +606,7 @@ class Database:
         tables['products'] = """
         CREATE TABLE IF NOT EXISTS products (
             id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(255) NOT NULL,
+            name VARCHAR(255) NOT NULL UNIQUE,
             price DECIMAL(10, 2) NOT NULL,
             quantity INT NOT NULL,
             category VARCHAR(100),
@@ -106,57 +650,280 @@ class Database:
         )
         """
         
+        # Applied schema migrations
+        tables['schema_version'] = """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        
         for table_name, query in tables.items():
             try:
-                self.cursor.execute(query)
+                self.cursor.execute(self.backend.ddl(query))
                 print(f"Created table {table_name} if it didn't exist")
-            except mysql.connector.Error as e:
+            except self.backend.Error as e:
                 print(f"Error creating table {table_name}: {e}")
     
-    def execute_query(self, query, params=None):
-        """Execute a query with optional parameters"""
+    def schema_version(self):
+        """Get the highest applied migration version (0 for none)"""
+        self.cursor.execute("SELECT MAX(version) FROM schema_version")
+        return self.cursor.fetchone()[0] or 0
+    
+    def migrate(self):
+        """Apply pending schema migrations, recording each in schema_version
+
+        Stops at the first failing migration so later ones never run on top of it.
+        Returns True if the schema is fully up to date.
+        """
         try:
-            self.cursor.execute(query, params or ())
-            self.connection.commit()
+            current = self.schema_version()
+            for version, description, method in self.MIGRATIONS:
+                if version <= current:
+                    continue
+                print(f"Applying migration {version}: {description}")
+                getattr(self, method)()
+                self.cursor.execute(
+                    self.sql("INSERT INTO schema_version (version, description) VALUES (%s, %s)"),
+                    (version, description)
+                )
+                if self.connection.in_transaction:
+                    self.connection.commit()
             return True
-        except mysql.connector.Error as e:
+        except self.backend.Error as e:
+            print(f"Error applying migration: {e}")
+            return False
+    
+    def _add_index(self, table, index_name, column, unique=False):
+        """Add an index online, unless one on the same column already exists"""
+        if self.backend.has_index(self.cursor, table, column, unique):
+            return
+        self.backend.add_index(self.cursor, table, index_name, column, unique)
+        print(f"Added index {index_name} on {table}({column})")
+    
+    def _migrate_lookup_indexes(self):
+        """Migration 1: index the columns products and purchases are searched and sorted by"""
+        # Fails on duplicate product names; those must be merged before upgrading
+        self._add_index("products", "idx_products_name", "name", unique=True)
+        self._add_index("products", "idx_products_category", "category")
+        self._add_index("purchases", "idx_purchases_purchase_date", "purchase_date")
+    
+    def _migrate_reservations(self):
+        """Migration 2: stock held by carts until checkout or expiry"""
+        self.cursor.execute(self.backend.ddl("""
+        CREATE TABLE IF NOT EXISTS reservations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            cart_id VARCHAR(64) NOT NULL,
+            product_id INT NOT NULL,
+            quantity INT NOT NULL,
+            expires_at DATETIME NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+        )
+        """))
+        self._add_index("reservations", "idx_reservations_cart_id", "cart_id")
+        # The sweeper finds expired holds by range scan
+        self._add_index("reservations", "idx_reservations_expires_at", "expires_at")
+    
+    def _migrate_holds_on_hand(self):
+        """Migration 3: products.quantity is on-hand stock again; holds are counted, not taken out"""
+        # Holds made before this migration were deducted from quantity, expired or not
+        self.cursor.execute("""
+        UPDATE products
+        SET quantity = quantity + (SELECT SUM(r.quantity) FROM reservations r WHERE r.product_id = products.id)
+        WHERE id IN (SELECT product_id FROM reservations)
+        """)
+        # Reserving and buying sum a product's live holds
+        self._add_index("reservations", "idx_reservations_product_id", "product_id")
+    
+    def execute_query(self, query, params=None):
+        """Execute a query with optional parameters
+
+        Returns the generated id for an insert into an AUTO_INCREMENT table,
+        True for any other successful statement and False on error.
+        """
+        try:
+            with self._borrow() as (connection, cursor):
+                query, cursor = self._statement(connection, cursor, self.sql(query))
+                cursor.execute(query, params or ())
+                # SQLite keeps the previous insert's id across other statements
+                # and skipped inserts, so only trust it when a row went in
+                inserted = cursor.rowcount > 0 and query.split(None, 1)[0].upper() in ("INSERT", "REPLACE")
+                last_id = cursor.lastrowid if inserted else None
+                if connection.in_transaction:
+                    connection.commit()
+            return last_id or True
+        except self.errors as e:
             print(f"Error executing query: {e}")
             return False
     
+    def insert(self, query, params=None):
+        """Execute an INSERT and return the generated id (None on error)"""
+        result = self.execute_query(query, params)
+        if result is False:
+            return None
+        return result if result is not True else None
+    
+    def execute_update(self, query, params=None):
+        """Execute a write and return the number of affected rows (None on error)"""
+        try:
+            with self._borrow() as (connection, cursor):
+                query, cursor = self._statement(connection, cursor, self.sql(query))
+                cursor.execute(query, params or ())
+                affected = cursor.rowcount
+                if connection.in_transaction:
+                    connection.commit()
+            return affected
+        except self.errors as e:
+            print(f"Error executing query: {e}")
+            return None
+    
+    def execute_many(self, query, seq_params):
+        """Execute a statement for every parameter tuple and commit once
+
+        Plain INSERT ... VALUES statements are sent as a single multi-row insert.
+        Returns the number of affected rows (None on error).
+        """
+        try:
+            with self._borrow() as (connection, cursor):
+                if self.backend.wrap_batches and not connection.in_transaction:
+                    self.backend.begin(connection)
+                try:
+                    cursor.executemany(self.sql(query), seq_params)
+                except self.errors:
+                    # The rows before the failing one must not ride along with
+                    # the connection's next commit
+                    if connection.in_transaction:
+                        connection.rollback()
+                    raise
+                affected = cursor.rowcount
+                if connection.in_transaction:
+                    connection.commit()
+            return affected
+        except self.errors as e:
+            print(f"Error executing batch: {e}")
+            return None
+    
     def fetch_all(self, query, params=None):
         """Execute a query and fetch all results"""
         try:
-            self.cursor.execute(query, params or ())
-            return self.cursor.fetchall()
-        except mysql.connector.Error as e:
+            with self._borrow() as (connection, cursor):
+                query, cursor = self._statement(connection, cursor, self.sql(query))
+                cursor.execute(query, params or ())
+                return cursor.fetchall()
+        except self.errors as e:
             print(f"Error fetching data: {e}")
             return []
     
+    def iter_rows(self, query, params=None, batch_size=1000, buffered=False):
+        """Execute a query and yield its rows, fetching batch_size at a time
+        
+        By default an unbuffered cursor streams rows from the server as they
+        are consumed, so memory stays constant however large the result is.
+        The connection stays busy until the generator is exhausted or closed;
+        without a pool, don't run other queries on this Database meanwhile.
+        """
+        try:
+            with self._borrow(buffered=buffered) as (connection, cursor):
+                cursor.execute(self.sql(query), params or ())
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+        except self.errors as e:
+            print(f"Error fetching data: {e}")
+    
     def fetch_one(self, query, params=None):
         """Execute a query and fetch one result"""
         try:
-            self.cursor.execute(query, params or ())
-            return self.cursor.fetchone()
-        except mysql.connector.Error as e:
+            with self._borrow() as (connection, cursor):
+                query, cursor = self._statement(connection, cursor, self.sql(query))
+                cursor.execute(query, params or ())
+                row = cursor.fetchone()
+                if self.backend.has_unread(connection):
+                    # Prepared cursors stream; drain them so the connection can be reused
+                    cursor.fetchall()
+                return row
+        except self.errors as e:
             print(f"Error fetching data: {e}")
             return None
     
     def close(self):
         """Close database connection"""
-        if self.connection:
+        if self.pool:
+            self.pool.close()
+            print(f"{self.backend.name} connection pool closed")
+        elif self.connection:
             self.cursor.close()
             self.connection.close()
-            print("MySQL connection closed")
+            print(f"{self.backend.name} connection closed")
 
 # Git Manager
 class GitManager:
-    def __init__(self, repo_path='.'):
-        """Initialize git manager with repo path"""
+    # Separates event messages inside a group commit
+    EVENT_SEPARATOR = "\n---\n\n"
+    # Mode of a subdirectory entry in a git tree
+    TREE_MODE = 0o040000
+    # Times a fast commit is retried when another writer moves HEAD first
+    COMMIT_ATTEMPTS = 10
+    # Trailer line carrying the event as JSON at the end of each event message
+    EVENT_TRAILER = "Event: "
+    # First line of each kind of event message, for filtering inside git
+    EVENT_GREP = {
+        'purchase': "^Purchase:",
+        'inventory_update': "^Inventory Update:",
+    }
+    # Lines of messages written before events carried a JSON trailer
+    PURCHASE_HEADER = re.compile(r"^Purchase: (.*) - (\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2})$", re.M)
+    PURCHASE_ITEM = re.compile(r"^\* (.*) x(\d+) @ \$(\d+(?:\.\d+)?)$", re.M)
+    UPDATE_HEADER = re.compile(r"^Inventory Update: (\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2})$", re.M)
+    UPDATE_ITEM = re.compile(r"^\* (.*): (-?\d+) → (-?\d+)$", re.M)
+    
+    def __init__(self, repo_path='.', group_size=1, group_window=None, journal_file='journal/%Y-%m-%d.jsonl',
+                 journal_max_bytes=1 << 20):
+        """Initialize git manager with repo path
+        
+        Every event is appended as a JSON line to the current journal segment
+        inside the repository, and only that file is staged and committed.
+        Segments are named by journal_file (a strftime pattern, so one file
+        per day by default) and roll over to name.1.jsonl, name.2.jsonl, ...
+        once they reach journal_max_bytes, so the file hashed on every commit
+        stays small however long the history gets.
+        
+        With group_size > 1 or a group_window, events are gathered and written
+        as one commit (in the order they were recorded) once group_size events
+        are pending or the oldest has waited group_window seconds. Call flush()
+        to commit a partial group.
+        
+        Args:
+            repo_path (str): Path of the git repository
+            group_size (int): Events per group commit
+            group_window (float): Seconds an event may wait for its group
+            journal_file (str): Journal segment path pattern, relative to the repository root
+            journal_max_bytes (int): Size at which a segment is closed and the next one started
+        """
         self.repo_path = repo_path
+        self.journal_file = journal_file
+        self.journal_max_bytes = journal_max_bytes
+        self._journal_parts = {}
+        self.group_size = group_size
+        self.group_window = group_window
+        self._pending = []
+        self._pending_since = None
+        self._stats = {
+            'commits': 0,
+            'events': 0,
+            'max_batch': 0,
+            'commit_time': 0.0,
+            'max_commit_time': 0.0,
+        }
         self.setup_repo()
     
     def setup_repo(self):
         """Setup git repository if it doesn't exist"""
+        git = require('git')
         try:
             self.repo = git.Repo(self.repo_path)
             print("Git repository already exists")
@@ -164,52 +931,313 @@ class GitManager:
             print("Initializing new git repository")
             self.repo = git.Repo.init(self.repo_path)
     
-    def commit_changes(self, message):
-        """Commit all changes with the provided message"""
+    def journal_segment(self):
+        """Path (relative to the repository root) of the segment new events go to"""
+        stem, ext = os.path.splitext(datetime.now().strftime(self.journal_file))
+        part = self._journal_parts.get(stem, 0)
+        while True:
+            name = f"{stem}.{part}{ext}" if part else stem + ext
+            path = os.path.join(self.repo.working_tree_dir, name)
+            if not os.path.exists(path) or os.path.getsize(path) < self.journal_max_bytes:
+                break
+            part += 1
+        # Only the current stem is remembered; older ones are never written again
+        self._journal_parts = {stem: part}
+        return name
+    
+    def commit_changes(self, message, paths=None):
+        """Commit changes with the provided message
+        
+        Args:
+            message (str): Commit message
+            paths (list): Commit only these paths instead of all changes
+        """
         try:
-            # Add all changes
-            self.repo.git.add('--all')
+            start = time.perf_counter()
             
-            # Check if there are changes to commit
-            if self.repo.is_dirty() or len(self.repo.untracked_files) > 0:
-                self.repo.git.commit('-m', message)
-                print(f"Changes committed: {message}")
-                return True
+            if paths:
+                # Stage and commit just these paths, without scanning the tree
+                self.repo.git.add('--', *paths)
+                self.repo.git.commit('-m', message, '--', *paths)
             else:
-                print("No changes to commit")
-                return False
+                # Add all changes
+                self.repo.git.add('--all')
+                
+                # Check if there are changes to commit
+                if not (self.repo.is_dirty() or len(self.repo.untracked_files) > 0):
+                    print("No changes to commit")
+                    return False
+                self.repo.git.commit('-m', message)
+            
+            self._count_commit(start)
+            print(f"Changes committed: {message.splitlines()[0]}")
+            return True
         except Exception as e:
             print(f"Error committing changes: {e}")
             return False
     
-    def record_purchase(self, customer_name, products):
+    def _count_commit(self, start):
+        """Update commit statistics for a commit that began at start"""
+        elapsed = time.perf_counter() - start
+        self._stats['commits'] += 1
+        self._stats['commit_time'] += elapsed
+        self._stats['max_commit_time'] = max(self._stats['max_commit_time'], elapsed)
+    
+    def _write_tree(self, tree_sha, parts, blob_sha, blob_mode):
+        """Store a copy of a tree with the file at path parts set to a blob
+        
+        Only the trees along the path are read and rewritten; everything else
+        is referenced by its existing sha.
+        
+        Args:
+            tree_sha (bytes): Binary sha of the tree to copy, or None for an empty tree
+            parts (list): Path components of the file below this tree
+            blob_sha (bytes): Binary sha of the file's blob
+            blob_mode (int): File mode for the entry
+        
+        Returns:
+            bytes: Binary sha of the new tree
+        """
+        from git.objects.fun import tree_entries_from_data, tree_to_stream
+        from gitdb import IStream
+        
+        entries = {}
+        if tree_sha is not None:
+            for entry in tree_entries_from_data(self.repo.odb.stream(tree_sha).read()):
+                entries[entry[2]] = entry
+        
+        name = parts[0]
+        if len(parts) == 1:
+            entries[name] = (blob_sha, blob_mode, name)
+        else:
+            existing = entries.get(name)
+            subtree = existing[0] if existing and existing[1] == self.TREE_MODE else None
+            entries[name] = (self._write_tree(subtree, parts[1:], blob_sha, blob_mode), self.TREE_MODE, name)
+        
+        # Git orders tree entries as if directory names ended with a slash
+        ordered = sorted(entries.values(), key=lambda e: e[2] + "/" if e[1] == self.TREE_MODE else e[2])
+        data = BytesIO()
+        tree_to_stream(ordered, data.write)
+        data = data.getvalue()
+        return self.repo.odb.store(IStream(b"tree", len(data), BytesIO(data))).binsha
+    
+    def _commit_journal(self, message, segment):
+        """Commit a journal segment through git's object layer
+        
+        The segment is hashed into a blob (refreshing its index entry), the
+        trees on its path are rewritten on top of HEAD and the commit is
+        written directly. Nothing scans the working tree and other staged
+        changes are left out, like git commit -- <segment>.
+        
+        Other processes (the server, cron commands, the menu) may commit to
+        the same repository, so the branch only moves if it still points at
+        the commit this one was built on; otherwise, or while another writer
+        holds the index lock, the commit is rebuilt on the new HEAD after a
+        short backoff.
+        """
+        from git import Commit, GitCommandError, Tree
+        
+        start = time.perf_counter()
+        parts = segment.replace(os.sep, "/").split("/")
+        for attempt in range(self.COMMIT_ATTEMPTS):
+            if attempt:
+                time.sleep(random.uniform(0, 0.005 * 2 ** min(attempt, 6)))
+            try:
+                entry = self.repo.index.add([segment])[0]
+            except OSError:
+                continue
+            
+            head = self.repo.head
+            parents = [head.commit] if head.is_valid() else []
+            base_tree = parents[0].tree.binsha if parents else None
+            tree_sha = self._write_tree(base_tree, parts, entry.binsha, entry.mode)
+            
+            commit = Commit.create_from_tree(
+                self.repo, Tree(self.repo, tree_sha), message,
+                parent_commits=parents, head=False
+            )
+            # An all-zero old value means the branch must not exist yet
+            old = parents[0].hexsha if parents else "0" * 40
+            try:
+                self.repo.git.update_ref("-m", "commit: " + message.split("\n", 1)[0],
+                                         "HEAD", commit.hexsha, old)
+            except GitCommandError:
+                continue
+            self._count_commit(start)
+            print(f"Changes committed: {message.splitlines()[0]}")
+            return True
+        raise RuntimeError(f"repository busy for {self.COMMIT_ATTEMPTS} commit attempts")
+    
+    @property
+    def grouping(self):
+        """Whether events are gathered into group commits"""
+        return self.group_size > 1 or self.group_window is not None
+    
+    def _append_journal(self, events, segment):
+        """Append events to a journal segment, one JSON object per line"""
+        path = os.path.join(self.repo.working_tree_dir, segment)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as journal:
+            for event in events:
+                journal.write(json.dumps(event, ensure_ascii=False, sort_keys=True) + "\n")
+    
+    def _commit_events(self, entries):
+        """Journal (message, event, on_commit) entries and commit them together
+        
+        Each entry's on_commit (if any) is called with whether the commit
+        succeeded, once it is known.
+        """
+        self._stats['events'] += len(entries)
+        self._stats['max_batch'] = max(self._stats['max_batch'], len(entries))
+        try:
+            segment = self.journal_segment()
+            self._append_journal([event for message, event, on_commit in entries], segment)
+        except OSError as e:
+            print(f"Error writing journal: {e}")
+            committed = False
+        else:
+            if len(entries) == 1:
+                message = entries[0][0]
+            else:
+                message = f"Batch: {len(entries)} events\n\n" + self.EVENT_SEPARATOR.join(
+                    message for message, event, on_commit in entries)
+            try:
+                committed = self._commit_journal(message, segment)
+            except Exception as e:
+                # Fall back to the porcelain commands if the object layer fails
+                print(f"Fast commit failed ({e}), using git commit")
+                committed = self.commit_changes(message, paths=[segment])
+        
+        for message, event, on_commit in entries:
+            if on_commit:
+                on_commit(committed)
+        return committed
+    
+    def _record(self, message, event, on_commit=None):
+        """Commit one event, or add it to the open group
+        
+        Returns False only if the event's own commit failed; a grouped event
+        reports its outcome through on_commit when its group is written.
+        """
+        if not self.grouping:
+            return self._commit_events([(message, event, on_commit)])
+        
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append((message, event, on_commit))
+        if len(self._pending) >= self.group_size:
+            return self.flush()
+        self.flush_if_due()
+        return True
+    
+    def flush_if_due(self):
+        """Commit the open group if its oldest event has waited group_window seconds"""
+        if (self._pending and self.group_window is not None
+                and time.monotonic() - self._pending_since >= self.group_window):
+            return self.flush()
+        return False
+    
+    def flush(self):
+        """Write all pending events as a single commit"""
+        if not self._pending:
+            return False
+        entries, self._pending = self._pending, []
+        self._pending_since = None
+        return self._commit_events(entries)
+    
+    def split_events(self, message):
+        """Split a commit message into its event messages, oldest first"""
+        if message.startswith("Batch:"):
+            return message.split("\n\n", 1)[1].split(self.EVENT_SEPARATOR)
+        return [message]
+    
+    def commit_stats(self):
+        """Get commit counts, batch sizes and time spent committing (seconds)"""
+        stats = dict(self._stats)
+        stats['pending'] = len(self._pending)
+        stats['avg_batch'] = stats['events'] / stats['commits'] if stats['commits'] else 0.0
+        stats['avg_commit_time'] = stats['commit_time'] / stats['commits'] if stats['commits'] else 0.0
+        return stats
+    
+    def record_purchase(self, customer_name, products, timestamp=None, on_commit=None):
         """Record a purchase in git history
         
         Args:
             customer_name (str): Name of the customer
             products (list): List of tuples (product_name, quantity, price)
+            timestamp (datetime): When the purchase happened (default: now)
+            on_commit (callable): Called with True once the event is committed, False if that failed
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        message = f"Purchase: {customer_name} - {timestamp}\n\n"
+        timestamp = timestamp or datetime.now()
+        message = f"Purchase: {customer_name} - {timestamp:%Y-%m-%d %H:%M:%S}\n\n"
         
         for product_name, quantity, price in products:
             message += f"* {product_name} x{quantity} @ ${price:.2f}\n"
         
-        return self.commit_changes(message)
+        event = {
+            'type': 'purchase',
+            'timestamp': timestamp.isoformat(timespec='seconds'),
+            'customer': customer_name,
+            'items': [
+                {'product': product_name, 'quantity': quantity, 'price': float(price)}
+                for product_name, quantity, price in products
+            ],
+        }
+        message += f"\n{self.EVENT_TRAILER}{json.dumps(event, ensure_ascii=False, sort_keys=True)}\n"
+        return self._record(message, event, on_commit)
     
-    def record_inventory_update(self, updated_products):
+    def record_inventory_update(self, updated_products, timestamp=None, on_commit=None):
         """Record inventory updates in git history
         
         Args:
-            updated_products (list): List of tuples (product_name, old_qty, new_qty)
+            updated_products (list): List of tuples (product_name, old_qty, new_qty),
+                with the product's previous name appended when it was renamed
+            timestamp (datetime): When the update happened (default: now)
+            on_commit (callable): Called with True once the event is committed, False if that failed
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        message = f"Inventory Update: {timestamp}\n\n"
+        timestamp = timestamp or datetime.now()
+        message = f"Inventory Update: {timestamp:%Y-%m-%d %H:%M:%S}\n\n"
+        
+        changes = []
+        for product_name, old_qty, new_qty, *renamed_from in updated_products:
+            change = {'product': product_name, 'old_quantity': old_qty, 'new_quantity': new_qty}
+            if renamed_from:
+                change['renamed_from'] = renamed_from[0]
+                message += f"* {renamed_from[0]} → {product_name}: {old_qty} → {new_qty}\n"
+            else:
+                message += f"* {product_name}: {old_qty} → {new_qty}\n"
+            changes.append(change)
+        
+        event = {
+            'type': 'inventory_update',
+            'timestamp': timestamp.isoformat(timespec='seconds'),
+            'changes': changes,
+        }
+        message += f"\n{self.EVENT_TRAILER}{json.dumps(event, ensure_ascii=False, sort_keys=True)}\n"
+        return self._record(message, event, on_commit)
+    
+    def iter_purchase_history(self, limit=None, grep="^Purchase:"):
+        """Lazily yield purchase messages from git logs, newest first
         
-        for product_name, old_qty, new_qty in updated_products:
-            message += f"* {product_name}: {old_qty} → {new_qty}\n"
+        The filter runs inside git (rev-list --grep) and the walk stops as
+        soon as limit purchases have been found.
         
-        return self.commit_changes(message)
+        Args:
+            limit (int): Maximum number of purchases to yield (None for all)
+            grep (str): Regular expression a matching commit message line must satisfy
+        """
+        if limit is not None and limit <= 0:
+            return
+        count = 0
+        # Every matching commit holds at least one purchase, so limit caps the walk
+        for commit in self.repo.iter_commits(grep=grep, max_count=limit):
+            # Newest first, also within a group commit
+            for event in reversed(self.split_events(commit.message)):
+                if event.startswith("Purchase:"):
+                    yield commit.hexsha, event
+                    count += 1
+                    if count == limit:
+                        return
     
     def get_purchase_history(self, limit=10):
         """Get purchase history from git logs
@@ -223,202 +1251,1476 @@ class GitManager:
         history = []
         
         try:
-            for commit in list(self.repo.iter_commits())[:limit]:
-                if commit.message.startswith("Purchase:"):
-                    history.append(commit.message)
+            for sha, event in self.iter_purchase_history(limit):
+                history.append(event)
         except Exception as e:
             print(f"Error getting purchase history: {e}")
         
         return history
-
-# Models
-class Product:
-    def __init__(self, db):
-        self.db = db
     
-    def add_product(self, name, price, quantity, category=None):
-        """Add a new product to the inventory"""
-        query = """
-        INSERT INTO products (name, price, quantity, category)
-        VALUES (%s, %s, %s, %s)
+    def parse_event(self, message):
+        """Parse one event message into its structured event
+        
+        Uses the JSON trailer when present and falls back to reading the
+        text lines of older messages.
+        
+        Returns:
+            dict: The event (type, timestamp and its details), or None if not an event
         """
-        params = (name, price, quantity, category)
-        return self.db.execute_query(query, params)
+        for line in reversed(message.rstrip().splitlines()):
+            if line.startswith(self.EVENT_TRAILER):
+                try:
+                    return json.loads(line[len(self.EVENT_TRAILER):])
+                except ValueError:
+                    break
+        
+        header = self.PURCHASE_HEADER.search(message)
+        if header and message.startswith("Purchase:"):
+            return {
+                'type': 'purchase',
+                'timestamp': f"{header.group(2)}T{header.group(3)}",
+                'customer': header.group(1),
+                'items': [
+                    {'product': product, 'quantity': int(quantity), 'price': float(price)}
+                    for product, quantity, price in self.PURCHASE_ITEM.findall(message)
+                ],
+            }
+        header = self.UPDATE_HEADER.search(message)
+        if header and message.startswith("Inventory Update:"):
+            return {
+                'type': 'inventory_update',
+                'timestamp': f"{header.group(1)}T{header.group(2)}",
+                'changes': [
+                    {'product': product, 'old_quantity': int(old_qty), 'new_quantity': int(new_qty)}
+                    for product, old_qty, new_qty in self.UPDATE_ITEM.findall(message)
+                ],
+            }
+        return None
     
-    def update_product(self, product_id, name=None, price=None, quantity=None, category=None):
-        """Update an existing product"""
-        # Get the current product data
-        current = self.get_product_by_id(product_id)
-        if not current:
-            return False
+    def query_events(self, kind=None, since=None, until=None, customer=None, product=None, rev=None):
+        """Stream parsed events from git history, oldest first
         
-        # Use current values if new ones are not provided
-        name = name if name is not None else current[1]
-        price = price if price is not None else current[2]
-        quantity = quantity if quantity is not None else current[3]
-        category = category if category is not None else current[4]
+        The kind and since filters are pushed down to git; the rest are
+        applied to each parsed event. Every event gets a 'sha' key naming the
+        commit it came from.
         
-        query = """
-        UPDATE products
-        SET name = %s, price = %s, quantity = %s, category = %s, updated_at = CURRENT_TIMESTAMP
-        WHERE id = %s
+        Args:
+            kind (str): 'purchase' or 'inventory_update' (default: both)
+            since (datetime): Only events at or after this time
+            until (datetime): Only events at or before this time
+            customer (str): Only purchases by this customer name
+            product (str): Only events that involve this product name
+            rev (str): Commit range to read, such as 'abc123..HEAD' (default: HEAD)
+        """
+        options = {'reverse': True}
+        if kind is not None:
+            options['grep'] = self.EVENT_GREP[kind]
+        if since is not None:
+            # Events are committed after they happen, so older commits can be skipped
+            options['since'] = since.isoformat(timespec='seconds')
+        since = since.isoformat(timespec='seconds') if since else None
+        until = until.isoformat(timespec='seconds') if until else None
+        
+        if not self.repo.head.is_valid():
+            return
+        for commit in self.repo.iter_commits(rev, **options):
+            for message in self.split_events(commit.message):
+                event = self.parse_event(message)
+                if event is None or (kind is not None and event['type'] != kind):
+                    continue
+                if (since and event['timestamp'] < since) or (until and event['timestamp'] > until):
+                    continue
+                if customer is not None and event.get('customer') != customer:
+                    continue
+                if product is not None:
+                    lines = event.get('items') or event.get('changes') or []
+                    if not any(product in (line['product'], line.get('renamed_from')) for line in lines):
+                        continue
+                event['sha'] = commit.hexsha
+                yield event
+    
+    def parse_purchase(self, message):
+        """Get customer, timestamp (ISO format) and total from a purchase message"""
+        event = self.parse_event(message)
+        if not event or event['type'] != 'purchase':
+            return None
+        total = sum(item['quantity'] * item['price'] for item in event['items'])
+        return {
+            'customer': event['customer'],
+            'timestamp': event['timestamp'],
+            'total': round(total, 2),
+        }
+    
+    def replay_inventory(self, start=None, quantities=None):
+        """Fold inventory events into expected stock per product in one pass
+        
+        Inventory updates set a product's quantity (moving it to its new name
+        when it was renamed) and purchases subtract from it. Replaying can resume from a checkpoint by passing the sha it was
+        taken at and the quantities it recorded.
+        
+        Args:
+            start (str): Only replay commits after this sha
+            quantities (dict): Expected quantities as of start
+        
+        Returns:
+            tuple: (quantities by product name, sha replayed up to, events replayed)
+        """
+        quantities = dict(quantities or {})
+        if not self.repo.head.is_valid():
+            return quantities, None, 0
+        head = self.repo.head.commit.hexsha
+        rev = f"{start}..{head}" if start else head
+        
+        replayed = 0
+        for event in self.query_events(rev=rev):
+            if event['type'] == 'inventory_update':
+                for change in event['changes']:
+                    if 'renamed_from' in change:
+                        quantities.pop(change['renamed_from'], None)
+                    quantities[change['product']] = change['new_quantity']
+            elif event['type'] == 'purchase':
+                for item in event['items']:
+                    quantities[item['product']] = quantities.get(item['product'], 0) - item['quantity']
+            replayed += 1
+        return quantities, head, replayed
+    
+    @property
+    def checkpoint_path(self):
+        """Last verified reconcile state, kept untracked inside the git directory"""
+        return os.path.join(self.repo.git_dir, "inventory_reconcile_checkpoint.json")
+    
+    def load_checkpoint(self):
+        """Get the last verified (sha, quantities), or (None, None) if unusable"""
+        from git.exc import GitCommandError
+        
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            # The sha must still be part of the history being replayed
+            if not self.repo.is_ancestor(checkpoint['sha'], self.repo.head.commit):
+                return None, None
+            return checkpoint['sha'], checkpoint['quantities']
+        except (OSError, ValueError, KeyError, GitCommandError):
+            return None, None
+    
+    def save_checkpoint(self, sha, quantities):
+        """Remember quantities verified against the database at sha"""
+        with open(self.checkpoint_path, "w", encoding="utf-8") as f:
+            json.dump({'sha': sha, 'quantities': quantities,
+                       'verified_at': datetime.now().isoformat(timespec='seconds')}, f, ensure_ascii=False)
+    
+    @property
+    def purchase_index_path(self):
+        """Sidecar index of purchase commits, kept untracked inside the git directory"""
+        return os.path.join(self.repo.git_dir, "inventory_purchase_index.jsonl")
+    
+    def update_purchase_index(self):
+        """Append purchases committed since the last update to the sidecar index
+        
+        The index stores one JSON line per purchase (sha, customer, timestamp,
+        total); a companion .head file holds the last indexed commit. If that
+        commit is no longer an ancestor of HEAD (the history was reset or
+        rewritten) the index is rebuilt from scratch.
+        
+        Returns:
+            int: Number of purchases added
+        """
+        from git.exc import GitCommandError
+        
+        head_path = self.purchase_index_path + ".head"
+        if not self.repo.head.is_valid():
+            return 0
+        head = self.repo.head.commit.hexsha
+        last = None
+        if os.path.exists(head_path) and os.path.exists(self.purchase_index_path):
+            with open(head_path) as f:
+                last = f.read().strip() or None
+        if last == head:
+            return 0
+        
+        if last is not None:
+            try:
+                # After a reset the old commit still exists, so last..head alone
+                # would keep the abandoned purchases in the index
+                if self.repo.is_ancestor(last, head):
+                    commits = list(self.repo.iter_commits(f"{last}..{head}", grep="^Purchase:"))
+                else:
+                    last = None
+            except GitCommandError:
+                # The old commit is gone altogether
+                last = None
+        if last is None:
+            commits = list(self.repo.iter_commits(head, grep="^Purchase:"))
+        
+        added = 0
+        with open(self.purchase_index_path, "a" if last else "w", encoding="utf-8") as index:
+            # Oldest first, so the index stays in commit order
+            for commit in reversed(commits):
+                for event in self.split_events(commit.message):
+                    entry = self.parse_purchase(event)
+                    if entry:
+                        entry['sha'] = commit.hexsha
+                        index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                        added += 1
+        with open(head_path, "w") as f:
+            f.write(head)
+        return added
+    
+    def find_purchases(self, customer=None, since=None, until=None, limit=None):
+        """Query purchases by customer and date range through the sidecar index
+        
+        Args:
+            customer (str): Only purchases by this customer name
+            since (datetime): Only purchases at or after this time
+            until (datetime): Only purchases at or before this time
+            limit (int): Maximum number of purchases to return, newest first
+        
+        Returns:
+            list: Dicts with sha, customer, timestamp (ISO format) and total
+        """
+        try:
+            self.update_purchase_index()
+        except Exception as e:
+            print(f"Error updating purchase index: {e}")
+            return []
+        
+        since = since.isoformat(timespec='seconds') if since else None
+        until = until.isoformat(timespec='seconds') if until else None
+        matches = deque(maxlen=limit)
+        if not os.path.exists(self.purchase_index_path):
+            return []
+        with open(self.purchase_index_path, encoding="utf-8") as index:
+            for line in index:
+                entry = json.loads(line)
+                if customer is not None and entry['customer'] != customer:
+                    continue
+                if (since and entry['timestamp'] < since) or (until and entry['timestamp'] > until):
+                    continue
+                matches.append(entry)
+        return list(reversed(matches))
+
+class GitWriter:
+    def __init__(self, git_manager, max_pending=1000):
+        """Record git events on a background thread so callers don't wait for git
+        
+        Events are committed in the order they were submitted. When max_pending
+        events are waiting, submitting blocks until the writer catches up, so
+        the audit trail is never silently dropped.
+        
+        Args:
+            git_manager (GitManager): Manager that performs the commits
+            max_pending (int): Bound on queued events
+        """
+        self.git = git_manager
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'recorded': 0,
+            'failed': 0,
+            'last_lag': 0.0,
+            'max_lag': 0.0,
+            'total_lag': 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name="git-writer", daemon=True)
+        self._thread.start()
+    
+    def _submit(self, method, *args):
+        """Queue a GitManager call, stamped with the time it was requested"""
+        # The event time is taken now, not when the commit eventually runs
+        self._queue.put((time.monotonic(), datetime.now(), method, args))
+        with self._lock:
+            self._stats['submitted'] += 1
+    
+    def record_purchase(self, customer_name, products):
+        """Queue GitManager.record_purchase"""
+        self._submit('record_purchase', customer_name, list(products))
+    
+    def record_inventory_update(self, updated_products):
+        """Queue GitManager.record_inventory_update"""
+        self._submit('record_inventory_update', list(updated_products))
+    
+    def _run(self):
+        """Writer thread: perform queued calls until a stop marker arrives"""
+        from functools import partial
+        
+        # Wake up a few times per window to close groups that have waited long enough
+        poll = self.git.group_window / 4 if self.git.group_window is not None else None
+        while True:
+            try:
+                item = self._queue.get(timeout=poll)
+            except queue.Empty:
+                self._call(self.git.flush_if_due)
+                continue
+            try:
+                if item is None:
+                    self._call(self.git.flush)
+                    return
+                queued_at, timestamp, method, args = item
+                if timestamp is None:
+                    # Control call such as flush, not an event
+                    self._call(getattr(self.git, method))
+                    continue
+                # Counted when the event's commit is written, which for a
+                # grouped event is when its group is flushed, not now
+                on_commit = partial(self._committed, queued_at)
+                try:
+                    getattr(self.git, method)(*args, timestamp=timestamp, on_commit=on_commit)
+                except Exception as e:
+                    print(f"Error recording git event: {e}")
+                    on_commit(False)
+            finally:
+                self._queue.task_done()
+    
+    def _committed(self, queued_at, committed):
+        """Count an event's commit outcome and its submit-to-commit lag"""
+        lag = time.monotonic() - queued_at
+        with self._lock:
+            self._stats['recorded' if committed else 'failed'] += 1
+            self._stats['last_lag'] = lag
+            self._stats['max_lag'] = max(self._stats['max_lag'], lag)
+            self._stats['total_lag'] += lag
+    
+    def _call(self, function, *args, **kwargs):
+        """Run a GitManager call on the writer thread, reporting errors"""
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            print(f"Error recording git event: {e}")
+            return False
+    
+    def flush(self):
+        """Wait until every queued event has been committed, including an open group"""
+        self._queue.put((time.monotonic(), None, 'flush', ()))
+        self._queue.join()
+    
+    def close(self):
+        """Flush pending events and stop the writer thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+    
+    def stats(self):
+        """Get queue depth and submit-to-commit lag (seconds)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        done = stats['recorded'] + stats['failed']
+        stats['avg_lag'] = stats['total_lag'] / done if done else 0.0
+        return stats
+
+# Bulk loading
+def bulk_load(db, query, rows, convert, chunk_size=1000, progress=None, write_chunk=None):
+    """Run an INSERT for every row in chunks, committing once per chunk
+    
+    Args:
+        db (Database): Database to write to
+        query (str): INSERT ... VALUES statement executed per row
+        rows (iterable): Raw rows, consumed lazily
+        convert (callable): Turns a raw row into query parameters; raising
+            TypeError or ValueError marks the row as failed
+        chunk_size (int): Rows sent per multi-row insert and commit
+        progress (callable): Called with the running stats after every chunk
+        write_chunk (callable): Writes a chunk's parameters and returns the affected
+            row count (None on error); defaults to db.execute_many(query, params)
+    
+    Returns:
+        dict: rows, written, failed, affected, chunks, seconds, rows_per_second
+    """
+    if write_chunk is None:
+        write_chunk = lambda params: db.execute_many(query, params)
+    stats = {'rows': 0, 'written': 0, 'failed': 0, 'affected': 0, 'chunks': 0,
+             'seconds': 0.0, 'rows_per_second': 0.0}
+    start = time.perf_counter()
+    rows = iter(rows)
+    
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        stats['rows'] += len(chunk)
+        
+        params = []
+        for row in chunk:
+            try:
+                params.append(convert(row))
+            except (TypeError, ValueError) as e:
+                print(f"Skipping invalid row {row!r}: {e}")
+                stats['failed'] += 1
+        
+        if params:
+            affected = write_chunk(params)
+            if affected is None:
+                stats['failed'] += len(params)
+            else:
+                stats['written'] += len(params)
+                stats['affected'] += affected
+        stats['chunks'] += 1
+        
+        stats['seconds'] = time.perf_counter() - start
+        stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        if progress:
+            progress(stats)
+    
+    return stats
+
+def _read_records(path, fields, file_format=None):
+    """Stream tuples of the given fields from a CSV (with header) or JSONL file"""
+    file_format = file_format or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        
+        for record in records:
+            yield tuple(record.get(field) for field in fields)
+
+# Caching
+class LRUCache:
+    def __init__(self, max_size=1000, ttl=None):
+        """Thread-safe least-recently-used cache with optional expiry
+        
+        Args:
+            max_size (int): Entries kept before the least recently used is evicted
+            ttl (float): Seconds an entry stays valid (None for no expiry)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+    
+    def get(self, key, default=None):
+        """Get a cached value, counting the lookup as a hit or miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+            return default
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry if full"""
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+    
+    def invalidate(self, key):
+        """Drop one entry if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Get hit, miss, eviction and expiry counters plus the hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+# Models
+class Product:
+    def __init__(self, db, cache_size=1000, cache_ttl=30.0):
+        """Product model with a read-through cache of rows by ID
+        
+        Cached rows may lag changes made by other processes by up to
+        cache_ttl seconds; stock checks at checkout always read the database.
+        Pass cache_size=0 to disable the cache.
+        """
+        self.db = db
+        self.cache = LRUCache(cache_size, cache_ttl)
+    
+    def add_product(self, name, price, quantity, category=None, record=None):
+        """Add a new product to the inventory and return its ID (None on error)
+        
+        With record (e.g. GitManager.record_inventory_update), the new stock
+        is reported as an inventory update from 0.
+        """
+        query = """
+        INSERT INTO products (name, price, quantity, category)
+        VALUES (%s, %s, %s, %s)
+        """
+        params = (name, price, quantity, category)
+        # A new ID cannot be cached yet, so there is nothing to invalidate
+        product_id = self.db.insert(query, params)
+        if product_id and record:
+            record([(name, 0, quantity)])
+        return product_id
+    
+    def bulk_upsert(self, rows, chunk_size=1000, update_existing=True, progress=None, record=None):
+        """Insert or update many products keyed by name, committing once per chunk
+        
+        Rows are consumed lazily, so any iterable (such as read_product_file)
+        can be loaded without holding it in memory. With record, every written
+        chunk is reported as one inventory update covering its new products
+        and changed quantities, so the git history can still be replayed.
+        
+        Args:
+            rows (iterable): Tuples (name, price, quantity, category)
+            chunk_size (int): Rows sent per multi-row insert and commit
+            update_existing (bool): Overwrite price, quantity and category (when given) of existing names
+            progress (callable): Called with the running stats after every chunk
+            record (callable): Takes a list of (product_name, old_qty, new_qty),
+                e.g. GitManager.record_inventory_update
+        
+        Returns:
+            dict: rows, written, failed, affected, chunks, seconds, rows_per_second
+        """
+        columns = ["price", "quantity", "category"] if update_existing else []
+        # A file without categories must not wipe the ones already set
+        upsert = self.db.backend.upsert_clause("name", columns, touch="updated_at", keep_if_null=("category",))
+        query = f"""
+        INSERT INTO products (name, price, quantity, category)
+        VALUES (%s, %s, %s, %s)
+        {upsert}
+        """
+        
+        def convert(row):
+            name, price, quantity, category = row
+            if not name:
+                raise ValueError("empty name")
+            return (name, float(price), int(quantity), category or None)
+        
+        def write_chunk(params):
+            # Quantities before the write, for the audit trail
+            names = list({row[0]: None for row in params})
+            placeholders = ", ".join(["%s"] * len(names))
+            old = dict(self.db.fetch_all(
+                f"SELECT name, quantity FROM products WHERE name IN ({placeholders})", names))
+            affected = self.db.execute_many(query, params)
+            if affected is None:
+                return None
+            
+            # A repeated name ends up with its last row, or its first if existing rows are kept
+            final = {}
+            for name, price, quantity, category in params:
+                if update_existing or name not in final:
+                    final[name] = quantity
+            changes = [(name, old.get(name, 0), quantity) for name, quantity in final.items()
+                       if name not in old or (update_existing and old[name] != quantity)]
+            if changes:
+                record(changes)
+            return affected
+        
+        # IDs of upserted rows are unknown, so drop everything
+        try:
+            return bulk_load(self.db, query, rows, convert, chunk_size, progress,
+                             write_chunk if record else None)
+        finally:
+            self.cache.clear()
+    
+    def update_product(self, product_id, name=None, price=None, quantity=None, category=None, record=None):
+        """Update an existing product
+        
+        With record (e.g. GitManager.record_inventory_update), a quantity
+        change or rename is reported as an inventory update, taking the old
+        quantity and name from the row the update starts from, so the git
+        history can follow the product to its new name.
+        """
+        # Get the current product data, bypassing the cache so stale values are never written back
+        current = self.get_product_by_id(product_id, use_cache=False)
+        if not current:
+            return False
+        
+        # Use current values if new ones are not provided
+        name = name if name is not None else current[1]
+        price = price if price is not None else current[2]
+        quantity = quantity if quantity is not None else current[3]
+        category = category if category is not None else current[4]
+        
+        query = """
+        UPDATE products
+        SET name = %s, price = %s, quantity = %s, category = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """
+        params = (name, price, quantity, category, product_id)
+        result = self.db.execute_query(query, params)
+        # Only after the write, or a concurrent reader could re-cache the old row
+        self.cache.invalidate(product_id)
+        if result and record and (quantity != current[3] or name != current[1]):
+            change = (name, current[3], quantity)
+            record([change + (current[1],) if name != current[1] else change])
+        return result
+    
+    def get_all_products(self):
+        """Get all products"""
+        query = "SELECT * FROM products ORDER BY name"
+        return self.db.fetch_all(query)
+    
+    def _iter_query(self, category=None):
+        """Query and parameters iter_products runs, shared with AsyncProduct"""
+        if category is not None:
+            return "SELECT * FROM products WHERE category = %s ORDER BY name", (category,)
+        return "SELECT * FROM products ORDER BY name", ()
+    
+    def iter_products(self, batch_size=1000, category=None):
+        """Stream all products (or one category) ordered by name without loading them all"""
+        query, params = self._iter_query(category)
+        return self.db.iter_rows(query, params, batch_size=batch_size)
+    
+    def get_products_page(self, after_name=None, page_size=20, category=None):
+        """Get one page of products ordered by name
+        
+        Keyset pagination: pass the name of the last product on the previous
+        page as after_name. Each page is an index range scan on the unique
+        name index, however deep into the catalog it is.
+        
+        Args:
+            after_name (str): Return products whose name sorts after this one
+            page_size (int): Maximum number of products to return
+            category (str): Only return products in this category
+        
+        Returns:
+            list: Product rows
+        """
+        conditions, params = [], []
+        if category is not None:
+            conditions.append("category = %s")
+            params.append(category)
+        if after_name is not None:
+            conditions.append("name > %s")
+            params.append(after_name)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        query = f"SELECT * FROM products{where} ORDER BY name LIMIT %s"
+        return self.db.fetch_all(query, (*params, page_size))
+    
+    def get_product_by_id(self, product_id, use_cache=True):
+        """Get a product by its ID, from the cache unless use_cache is False"""
+        if use_cache:
+            product = self.cache.get(product_id)
+            if product is not None:
+                return product
+        
+        query = "SELECT * FROM products WHERE id = %s"
+        product = self.db.fetch_one(query, (product_id,))
+        if product is not None:
+            self.cache.put(product_id, product)
+        return product
+    
+    def invalidate(self, product_ids):
+        """Drop cached rows for products changed outside this model"""
+        for product_id in product_ids:
+            self.cache.invalidate(product_id)
+    
+    def cache_stats(self):
+        """Get product cache hit/miss counters"""
+        return self.cache.stats()
+    
+    def get_product_by_name(self, name):
+        """Get a product by its name"""
+        query = "SELECT * FROM products WHERE name = %s"
+        return self.db.fetch_one(query, (name,))
+    
+    def update_quantity(self, product_id, quantity_change):
+        """Update product quantity (positive = add, negative = remove)
+
+        The stock check and the change happen in one conditional UPDATE, so
+        concurrent purchases cannot oversell or lose each other's updates.
+        """
+        if quantity_change == 0:
+            return self.get_product_by_id(product_id) is not None
+        
+        query = """
+        UPDATE products
+        SET quantity = quantity + %s, updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s AND quantity + %s >= 0
+        """
+        params = (quantity_change, product_id, quantity_change)
+        affected = self.db.execute_update(query, params)
+        # Only after the write, or a concurrent reader could re-cache the old row
+        self.cache.invalidate(product_id)
+        if affected is None:
+            return False
+        
+        if affected == 0:
+            # Only the failure path pays for a lookup to explain why
+            if self.get_product_by_id(product_id, use_cache=False):
+                print(f"Error: Insufficient quantity for product #{product_id}")
+            return False
+        
+        return True
+
+def read_product_file(path, file_format=None):
+    """Stream product rows from a CSV or JSONL file
+    
+    CSV files need a header row; both formats use the keys name, price,
+    quantity and category (optional). The format is taken from the file
+    extension unless file_format is given.
+    
+    Yields:
+        tuple: (name, price, quantity, category) as read from the file
+    """
+    return _read_records(path, ("name", "price", "quantity", "category"), file_format)
+
+def read_customer_file(path, file_format=None):
+    """Stream customer rows from a CSV or JSONL file with the keys name, email and phone
+    
+    Yields:
+        tuple: (name, email, phone) as read from the file
+    """
+    return _read_records(path, ("name", "email", "phone"), file_format)
+
+class Customer:
+    def __init__(self, db, cache_size=1000, cache_ttl=300.0):
+        """Customer model with a read-through cache keyed by both ID and email
+        
+        Pass cache_size=0 to disable the cache.
+        """
+        self.db = db
+        # Entries are keyed ('id', customer_id) and ('email', email)
+        self.cache = LRUCache(cache_size, cache_ttl)
+    
+    def add_customer(self, name, email=None, phone=None):
+        """Add a new customer and return its ID (None on error)"""
+        query = """
+        INSERT INTO customers (name, email, phone)
+        VALUES (%s, %s, %s)
+        """
+        params = (name, email, phone)
+        if email:
+            self.cache.invalidate(('email', email))
+        return self.db.insert(query, params)
+    
+    def bulk_import(self, rows, chunk_size=1000, progress=None):
+        """Insert many customers, skipping emails that already exist
+        
+        Duplicates are detected by the database through the UNIQUE email
+        column, both against existing customers and within the import.
+        Rows without an email are always inserted.
+        
+        Args:
+            rows (iterable): Tuples (name, email, phone), consumed lazily
+            chunk_size (int): Rows sent per multi-row insert and commit
+            progress (callable): Called with the running stats after every chunk
+        
+        Returns:
+            dict: rows, inserted, skipped, failed, chunks, seconds, rows_per_second
+        """
+        # A no-op update makes duplicates count as 0 affected rows without
+        # hiding other errors the way INSERT IGNORE would
+        query = f"""
+        INSERT INTO customers (name, email, phone)
+        VALUES (%s, %s, %s)
+        {self.db.backend.upsert_clause("email", [])}
+        """
+        
+        def convert(row):
+            name, email, phone = row
+            if not name:
+                raise ValueError("empty name")
+            return (name, email or None, phone or None)
+        
+        def summarize(stats):
+            summary = dict(stats)
+            summary['inserted'] = summary.pop('affected')
+            summary['skipped'] = summary.pop('written') - summary['inserted']
+            return summary
+        
+        callback = (lambda stats: progress(summarize(stats))) if progress else None
+        try:
+            return summarize(bulk_load(self.db, query, rows, convert, chunk_size, callback))
+        finally:
+            self.cache.clear()
+    
+    def get_all_customers(self):
+        """Get all customers"""
+        query = "SELECT * FROM customers ORDER BY name"
+        return self.db.fetch_all(query)
+    
+    def _iter_query(self):
+        """Query and parameters iter_customers runs, shared with AsyncCustomer"""
+        return "SELECT * FROM customers ORDER BY id", ()
+    
+    def iter_customers(self, batch_size=1000):
+        """Stream all customers ordered by ID without loading them all"""
+        query, params = self._iter_query()
+        return self.db.iter_rows(query, params, batch_size=batch_size)
+    
+    def _lookup(self, key, query, value):
+        """Read a customer through the cache, filing the row under both keys"""
+        customer = self.cache.get(key)
+        if customer is not None:
+            return customer
+        
+        customer = self.db.fetch_one(query, (value,))
+        if customer is not None:
+            self.cache.put(('id', customer[0]), customer)
+            if customer[2]:
+                self.cache.put(('email', customer[2]), customer)
+        return customer
+    
+    def get_customer_by_id(self, customer_id):
+        """Get a customer by ID"""
+        query = "SELECT * FROM customers WHERE id = %s"
+        return self._lookup(('id', customer_id), query, customer_id)
+    
+    def get_customer_by_email(self, email):
+        """Get a customer by email"""
+        query = "SELECT * FROM customers WHERE email = %s"
+        return self._lookup(('email', email), query, email)
+    
+    def cache_stats(self):
+        """Get customer cache hit/miss counters and hit rate"""
+        return self.cache.stats()
+
+def _hold_time(offset=0):
+    """Now plus offset seconds, as stored in reservations.expires_at"""
+    return (datetime.now() + timedelta(seconds=offset)).strftime("%Y-%m-%d %H:%M:%S")
+
+def _held_units(db, cursor, product_ids):
+    """Units of each product in live (unexpired) cart holds, read on cursor's transaction"""
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    cursor.execute(
+        db.sql(f"""
+        SELECT product_id, CAST(SUM(quantity) AS SIGNED)
+        FROM reservations
+        WHERE product_id IN ({placeholders}) AND expires_at > %s
+        GROUP BY product_id
+        """),
+        list(product_ids) + [_hold_time()]
+    )
+    return dict(cursor.fetchall())
+
+class Purchase:
+    def __init__(self, db, product_model=None):
+        """Purchase model; product_model's cache is invalidated for sold products"""
+        self.db = db
+        self.product_model = product_model
+    
+    def create_purchase(self, customer_id, items):
+        """Create a new purchase
+        
+        Runs as a single transaction: all products are locked with one
+        SELECT ... FOR UPDATE, the items go in with one multi-row insert and
+        stock is decremented with one UPDATE, so the round trip count does not
+        grow with the basket size and a failure leaves nothing behind. Units
+        held by carts can't be bought.
+        
+        Args:
+            customer_id (int): ID of the customer
+            items (list): List of tuples (product_id, quantity)
+        
+        Returns:
+            tuple: (success, purchase_id, items_details)
+        """
+        if not items:
+            print("Error: No items in purchase")
+            return False, None, None
+        
+        # Total quantity per product, so repeated lines are checked together
+        quantities = {}
+        for product_id, quantity in items:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        product_ids = list(quantities)
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        sql = self.db.sql
+        
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(
+                    sql(f"SELECT id, name, price, quantity FROM products WHERE id IN ({placeholders})"
+                        + self.db.backend.lock_rows),
+                    product_ids
+                )
+                products = {row[0]: row for row in cursor.fetchall()}
+                held = _held_units(self.db, cursor, product_ids)
+                
+                # Verify quantities against the locked rows
+                for product_id in product_ids:
+                    product = products.get(product_id)
+                    if not product:
+                        print(f"Error: Product #{product_id} not found")
+                        return False, None, None
+                    if product[3] - held.get(product_id, 0) < quantities[product_id]:
+                        print(f"Error: Insufficient quantity for {product[1]}")
+                        return False, None, None
+                
+                total_amount = 0
+                items_details = []
+                for product_id, quantity in items:
+                    product = products[product_id]
+                    total_amount += product[2] * quantity
+                    items_details.append((product[0], product[1], quantity, product[2]))
+                
+                # Create purchase record
+                cursor.execute(
+                    sql("INSERT INTO purchases (customer_id, total_amount) VALUES (%s, %s)"),
+                    (customer_id, total_amount)
+                )
+                purchase_id = cursor.lastrowid
+                
+                # Add purchase items in one multi-row insert
+                cursor.executemany(
+                    sql("""
+                    INSERT INTO purchase_items (purchase_id, product_id, quantity, price_per_unit)
+                    VALUES (%s, %s, %s, %s)
+                    """),
+                    [(purchase_id, product_id, quantity, price)
+                     for product_id, product_name, quantity, price in items_details]
+                )
+                
+                # Decrement stock for every product in one statement
+                cases = " ".join(["WHEN %s THEN %s"] * len(product_ids))
+                params = []
+                for product_id in product_ids:
+                    params.extend((product_id, quantities[product_id]))
+                cursor.execute(
+                    sql(f"""
+                    UPDATE products
+                    SET quantity = quantity - CASE id {cases} END, updated_at = CURRENT_TIMESTAMP
+                    WHERE id IN ({placeholders})
+                    """),
+                    params + product_ids
+                )
+        except self.db.errors as e:
+            print(f"Error creating purchase: {e}")
+            return False, None, None
+        
+        if self.product_model:
+            self.product_model.invalidate(product_ids)
+        return True, purchase_id, items_details
+    
+    def get_purchase_by_id(self, purchase_id):
+        """Get purchase details by ID"""
+        query = """
+        SELECT p.id, p.customer_id, p.total_amount, p.purchase_date, c.name
+        FROM purchases p
+        LEFT JOIN customers c ON p.customer_id = c.id
+        WHERE p.id = %s
+        """
+        return self.db.fetch_one(query, (purchase_id,))
+    
+    def get_purchase_items(self, purchase_id):
+        """Get all items in a purchase"""
+        query = """
+        SELECT pi.id, pi.product_id, pi.quantity, pi.price_per_unit, p.name
+        FROM purchase_items pi
+        JOIN products p ON pi.product_id = p.id
+        WHERE pi.purchase_id = %s
+        """
+        return self.db.fetch_all(query, (purchase_id,))
+    
+    def iter_purchase_items(self, batch_size=1000):
+        """Stream every purchase item with its purchase date and product name"""
+        query = """
+        SELECT pi.id, pi.purchase_id, p.purchase_date, pi.product_id, pr.name, pi.quantity, pi.price_per_unit
+        FROM purchase_items pi
+        JOIN purchases p ON pi.purchase_id = p.id
+        JOIN products pr ON pi.product_id = pr.id
+        ORDER BY pi.id
+        """
+        return self.db.iter_rows(query, batch_size=batch_size)
+    
+    def get_all_purchases(self, limit=50):
+        """Get all purchases"""
+        query = """
+        SELECT p.id, p.customer_id, p.total_amount, p.purchase_date, c.name
+        FROM purchases p
+        LEFT JOIN customers c ON p.customer_id = c.id
+        ORDER BY p.purchase_date DESC
+        LIMIT %s
+        """
+        return self.db.fetch_all(query, (limit,))
+
+class Reservation:
+    def __init__(self, db, product_model=None, hold_seconds=900):
+        """Stock holds for shopping carts
+        
+        products.quantity stays the stock on hand; a product's live holds are
+        counted against it, so stock in a cart can't be sold to anyone else
+        while admin edits of the quantity keep meaning what they say. Checkout
+        takes the units out. Holds expire hold_seconds after the cart was last
+        added to and stop counting at once; sweep() (or a ReservationSweeper)
+        deletes them.
+        
+        Args:
+            db (Database): Database
+            product_model (Product): Model whose cache is invalidated when stock moves
+            hold_seconds (float): How long an idle cart keeps its stock
+        """
+        self.db = db
+        self.product_model = product_model
+        self.hold_seconds = hold_seconds
+    
+    def _invalidate(self, product_ids):
+        if self.product_model:
+            self.product_model.invalidate(product_ids)
+    
+    def reserve(self, cart_id, product_id, quantity):
+        """Hold quantity units of a product for a cart
+        
+        The product row is locked while its live holds are summed, so two
+        carts can never hold the same units. Every reservation also pushes
+        back the expiry of the cart's other live holds.
+        
+        Args:
+            cart_id (str): Cart the hold belongs to
+            product_id (int): ID of the product
+            quantity (int): Units to hold
+        
+        Returns:
+            int: Reservation ID, 0 if the stock isn't there, or None on error
+        """
+        if quantity <= 0:
+            print("Error: Quantity must be positive")
+            return None
+        sql = self.db.sql
+        now = _hold_time()
+        expires_at = _hold_time(self.hold_seconds)
+        
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(sql("SELECT quantity FROM products WHERE id = %s" + self.db.backend.lock_rows),
+                               (product_id,))
+                product = cursor.fetchone()
+                if product is None:
+                    return 0
+                held = _held_units(self.db, cursor, [product_id]).get(product_id, 0)
+                if product[0] - held < quantity:
+                    return 0
+                # Activity keeps the whole cart alive; expired holds have
+                # stopped counting and may be sold already, so they stay dead
+                cursor.execute(sql("UPDATE reservations SET expires_at = %s WHERE cart_id = %s AND expires_at > %s"),
+                               (expires_at, cart_id, now))
+                cursor.execute(
+                    sql("INSERT INTO reservations (cart_id, product_id, quantity, expires_at) VALUES (%s, %s, %s, %s)"),
+                    (cart_id, product_id, quantity, expires_at)
+                )
+                reservation_id = cursor.lastrowid
+        except self.db.errors as e:
+            print(f"Error reserving stock: {e}")
+            return None
+        
+        return reservation_id
+    
+    def available(self, product_id):
+        """Units of a product not held by a live cart (None if there is no such product)"""
+        query = """
+        SELECT p.quantity - COALESCE((
+            SELECT CAST(SUM(r.quantity) AS SIGNED) FROM reservations r
+            WHERE r.product_id = p.id AND r.expires_at > %s
+        ), 0)
+        FROM products p
+        WHERE p.id = %s
+        """
+        row = self.db.fetch_one(query, (_hold_time(), product_id))
+        return row[0] if row else None
+    
+    def get_cart(self, cart_id):
+        """Get a cart's live holds as (product_id, name, quantity, price, expires_at), one per product"""
+        query = """
+        SELECT r.product_id, p.name, CAST(SUM(r.quantity) AS SIGNED), p.price, MAX(r.expires_at)
+        FROM reservations r
+        JOIN products p ON r.product_id = p.id
+        WHERE r.cart_id = %s AND r.expires_at > %s
+        GROUP BY r.product_id, p.name, p.price
+        ORDER BY MIN(r.id)
+        """
+        return self.db.fetch_all(query, (cart_id, _hold_time()))
+    
+    def checkout(self, cart_id, customer_id=None):
+        """Turn a cart's live holds into a purchase
+        
+        The holds already set the units aside, so checkout is one purchase
+        row, one multi-row insert of its items, one UPDATE taking the units
+        out of stock and one delete of the holds. It only fails for lack of
+        stock if the quantity was lowered below what carts hold.
+        
+        Args:
+            cart_id (str): Cart to check out
+            customer_id (int): ID of the customer (None for anonymous)
+        
+        Returns:
+            tuple: (success, purchase_id, items_details) like Purchase.create_purchase
+        """
+        sql = self.db.sql
+        
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(
+                    sql("""
+                    SELECT r.id, r.product_id, r.quantity, p.name, p.price
+                    FROM reservations r
+                    JOIN products p ON r.product_id = p.id
+                    WHERE r.cart_id = %s AND r.expires_at > %s
+                    ORDER BY r.id
+                    """ + self.db.backend.lock_rows),
+                    (cart_id, _hold_time())
+                )
+                holds = cursor.fetchall()
+                if not holds:
+                    print("Error: Cart is empty or its holds have expired")
+                    return False, None, None
+                
+                # One line per product, in the order they were added
+                lines = {}
+                for reservation_id, product_id, quantity, name, price in holds:
+                    line = lines.setdefault(product_id, [product_id, name, 0, price])
+                    line[2] += quantity
+                items_details = [tuple(line) for line in lines.values()]
+                total_amount = sum(quantity * price for product_id, name, quantity, price in items_details)
+                
+                product_ids = list(lines)
+                product_placeholders = ", ".join(["%s"] * len(product_ids))
+                cursor.execute(
+                    sql(f"SELECT id, quantity FROM products WHERE id IN ({product_placeholders})"
+                        + self.db.backend.lock_rows),
+                    product_ids
+                )
+                stock = dict(cursor.fetchall())
+                for product_id, name, quantity, price in items_details:
+                    if stock.get(product_id, 0) < quantity:
+                        print(f"Error: Insufficient quantity for {name}")
+                        return False, None, None
+                
+                cursor.execute(
+                    sql("INSERT INTO purchases (customer_id, total_amount) VALUES (%s, %s)"),
+                    (customer_id, total_amount)
+                )
+                purchase_id = cursor.lastrowid
+                cursor.executemany(
+                    sql("""
+                    INSERT INTO purchase_items (purchase_id, product_id, quantity, price_per_unit)
+                    VALUES (%s, %s, %s, %s)
+                    """),
+                    [(purchase_id, product_id, quantity, price)
+                     for product_id, name, quantity, price in items_details]
+                )
+                
+                # Take the units out of stock for every product in one statement
+                cases = " ".join(["WHEN %s THEN %s"] * len(product_ids))
+                params = []
+                for product_id, name, quantity, price in items_details:
+                    params.extend((product_id, quantity))
+                cursor.execute(
+                    sql(f"""
+                    UPDATE products
+                    SET quantity = quantity - CASE id {cases} END, updated_at = CURRENT_TIMESTAMP
+                    WHERE id IN ({product_placeholders})
+                    """),
+                    params + product_ids
+                )
+                
+                ids = [hold[0] for hold in holds]
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(sql(f"DELETE FROM reservations WHERE id IN ({placeholders})"), ids)
+        except self.db.errors as e:
+            print(f"Error checking out cart: {e}")
+            return False, None, None
+        
+        self._invalidate(product_ids)
+        return True, purchase_id, items_details
+    
+    def release(self, cart_id, product_id=None):
+        """Drop a cart's holds, or just its holds on one product, freeing the units
+        
+        Returns:
+            int: Number of holds released (None on error)
+        """
+        query = "SELECT id FROM reservations WHERE cart_id = %s"
+        params = [cart_id]
+        if product_id is not None:
+            query += " AND product_id = %s"
+            params.append(product_id)
+        return self._release(query, params)
+    
+    def sweep(self, limit=1000):
+        """Delete up to limit expired holds, which no longer count against stock
+        
+        Returns:
+            int: Number of holds released (None on error)
+        """
+        query = "SELECT id FROM reservations WHERE expires_at <= %s ORDER BY expires_at LIMIT %s"
+        return self._release(query, [_hold_time(), limit])
+    
+    def _release(self, query, params):
+        """Delete the holds query selects (by id)"""
+        sql = self.db.sql
+        
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(sql(query + self.db.backend.lock_rows), params)
+                ids = [row[0] for row in cursor.fetchall()]
+                if ids:
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    cursor.execute(sql(f"DELETE FROM reservations WHERE id IN ({placeholders})"), ids)
+        except self.db.errors as e:
+            print(f"Error releasing reservations: {e}")
+            return None
+        return len(ids)
+
+
+class ReservationSweeper:
+    def __init__(self, reservation_model, interval=30.0):
+        """Release expired holds on a background thread every interval seconds
+        
+        Args:
+            reservation_model (Reservation): Reservations to sweep
+            interval (float): Seconds between sweeps
+        """
+        self.reservations = reservation_model
+        self.interval = interval
+        self._stop = threading.Event()
+        self._stats = {'sweeps': 0, 'released': 0, 'failed': 0}
+        self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        """Sweeper thread: sweep until stopped"""
+        limit = 1000
+        while not self._stop.wait(self.interval):
+            self._stats['sweeps'] += 1
+            # Keep going while full batches show a backlog
+            released = limit
+            while released == limit and not self._stop.is_set():
+                released = self.reservations.sweep(limit)
+                if released is None:
+                    self._stats['failed'] += 1
+                    break
+                self._stats['released'] += released
+    
+    def close(self):
+        """Stop the sweeper thread"""
+        self._stop.set()
+        self._thread.join()
+    
+    def stats(self):
+        """Get sweep, release and failure counters"""
+        return dict(self._stats)
+
+# Async data access
+class AsyncDatabase:
+    def __init__(self, db, max_workers=None):
+        """Coroutine front end for a Database
+        
+        Blocking queries run on a thread pool sized to the connection pool, so
+        every worker can hold a connection and the event loop never blocks.
+        Callers beyond that wait on the pool's queue as cheap suspended
+        coroutines rather than as OS threads. A Database without a pool shares
+        one connection and cursor, so it gets a single worker.
+        
+        Args:
+            db (Database): Connected database, ideally pooled
+            max_workers (int): Worker threads (default: the pool's max_size)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self.db = db
+        self.max_workers = (max_workers or db.pool_max_size) if db.pool is not None else 1
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="db")
+    
+    async def run(self, function, *args, **kwargs):
+        """Run a blocking call on the database threads and await its result"""
+        import asyncio
+        from functools import partial
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+    
+    async def execute(self, query, params=None):
+        """Coroutine version of Database.execute_query"""
+        return await self.run(self.db.execute_query, query, params)
+    
+    async def insert(self, query, params=None):
+        """Coroutine version of Database.insert"""
+        return await self.run(self.db.insert, query, params)
+    
+    async def execute_update(self, query, params=None):
+        """Coroutine version of Database.execute_update"""
+        return await self.run(self.db.execute_update, query, params)
+    
+    async def execute_many(self, query, seq_params):
+        """Coroutine version of Database.execute_many"""
+        return await self.run(self.db.execute_many, query, seq_params)
+    
+    async def fetch_one(self, query, params=None):
+        """Coroutine version of Database.fetch_one"""
+        return await self.run(self.db.fetch_one, query, params)
+    
+    async def fetch_all(self, query, params=None):
+        """Coroutine version of Database.fetch_all"""
+        return await self.run(self.db.fetch_all, query, params)
+    
+    async def iter_rows(self, query, params=None, batch_size=1000):
+        """Async generator over Database.iter_rows
+        
+        Each batch is fetched on a database thread and its rows are yielded on
+        the event loop. A break out of `async for` doesn't close an async
+        generator, so the connection stays checked out until it is garbage
+        collected; to stop early, iterate under contextlib.aclosing() (or
+        await aclose()), which releases it straight away:
+        
+            async with aclosing(adb.iter_rows(query)) as rows:
+                async for row in rows:
+                    ...
+        """
+        rows = self.db.iter_rows(query, params, batch_size=batch_size)
+        try:
+            while True:
+                batch = await self.run(list, islice(rows, batch_size))
+                if not batch:
+                    return
+                for row in batch:
+                    yield row
+        finally:
+            await self.run(rows.close)
+    
+    async def close(self):
+        """Wait for running queries to finish, then close the database"""
+        import asyncio
+        
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.db.close()
+
+
+class AsyncProduct:
+    def __init__(self, adb, product_model=None):
+        """Coroutine versions of the Product methods
+        
+        Cache hits are answered on the event loop without a thread hop; only
+        misses and writes go to the database threads.
+        
+        Args:
+            adb (AsyncDatabase): Database to run queries on
+            product_model (Product): Model (and cache) to share; a new one by default
         """
-        params = (name, price, quantity, category, product_id)
-        return self.db.execute_query(query, params)
+        self.adb = adb
+        self.model = product_model or Product(adb.db)
     
-    def get_all_products(self):
-        """Get all products"""
-        query = "SELECT * FROM products ORDER BY name"
-        return self.db.fetch_all(query)
+    async def get_product_by_id(self, product_id, use_cache=True):
+        """Get a product by its ID, from the cache unless use_cache is False"""
+        if use_cache:
+            product = self.model.cache.get(product_id)
+            if product is not None:
+                return product
+        return await self.adb.run(self.model.get_product_by_id, product_id, use_cache=False)
     
-    def get_product_by_id(self, product_id):
-        """Get a product by its ID"""
-        query = "SELECT * FROM products WHERE id = %s"
-        return self.db.fetch_one(query, (product_id,))
+    async def get_product_by_name(self, name):
+        """Get a product by name"""
+        return await self.adb.run(self.model.get_product_by_name, name)
     
-    def get_product_by_name(self, name):
-        """Get a product by its name"""
-        query = "SELECT * FROM products WHERE name = %s"
-        return self.db.fetch_one(query, (name,))
+    async def get_products_page(self, after_name=None, page_size=20, category=None):
+        """Get one page of products ordered by name"""
+        return await self.adb.run(self.model.get_products_page, after_name, page_size, category)
     
-    def update_quantity(self, product_id, quantity_change):
-        """Update product quantity (positive = add, negative = remove)"""
-        product = self.get_product_by_id(product_id)
-        if not product:
-            return False
-        
-        current_quantity = product[3]
-        new_quantity = current_quantity + quantity_change
-        
-        if new_quantity < 0:
-            print(f"Error: Insufficient quantity for product #{product_id}")
-            return False
-        
-        query = "UPDATE products SET quantity = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s"
-        params = (new_quantity, product_id)
-        return self.db.execute_query(query, params)
-
-class Customer:
-    def __init__(self, db):
-        self.db = db
+    async def get_all_products(self):
+        """Get all products"""
+        return await self.adb.run(self.model.get_all_products)
     
-    def add_customer(self, name, email=None, phone=None):
-        """Add a new customer"""
-        query = """
-        INSERT INTO customers (name, email, phone)
-        VALUES (%s, %s, %s)
-        """
-        params = (name, email, phone)
-        return self.db.execute_query(query, params)
+    def iter_products(self, batch_size=1000, category=None):
+        """Async generator over all products (or one category) ordered by name; see AsyncDatabase.iter_rows"""
+        query, params = self.model._iter_query(category)
+        return self.adb.iter_rows(query, params, batch_size=batch_size)
     
-    def get_all_customers(self):
-        """Get all customers"""
-        query = "SELECT * FROM customers ORDER BY name"
-        return self.db.fetch_all(query)
+    async def add_product(self, name, price, quantity, category=None, record=None):
+        """Add a new product and return its ID (None on error)"""
+        return await self.adb.run(self.model.add_product, name, price, quantity, category, record=record)
     
-    def get_customer_by_id(self, customer_id):
-        """Get a customer by ID"""
-        query = "SELECT * FROM customers WHERE id = %s"
-        return self.db.fetch_one(query, (customer_id,))
+    async def update_product(self, product_id, name=None, price=None, quantity=None, category=None, record=None):
+        """Update product details"""
+        return await self.adb.run(self.model.update_product, product_id, name, price, quantity, category,
+                                  record=record)
     
-    def get_customer_by_email(self, email):
-        """Get a customer by email"""
-        query = "SELECT * FROM customers WHERE email = %s"
-        return self.db.fetch_one(query, (email,))
-
-class Purchase:
-    def __init__(self, db):
-        self.db = db
+    async def update_quantity(self, product_id, quantity_change):
+        """Change product quantity if enough stock remains"""
+        return await self.adb.run(self.model.update_quantity, product_id, quantity_change)
     
-    def create_purchase(self, customer_id, items):
-        """Create a new purchase
+    async def bulk_upsert(self, rows, chunk_size=1000, update_existing=True, record=None):
+        """Insert or update many products"""
+        return await self.adb.run(self.model.bulk_upsert, rows, chunk_size, update_existing, record=record)
+
+
+class AsyncCustomer:
+    def __init__(self, adb, customer_model=None):
+        """Coroutine versions of the Customer methods, answering cache hits on the event loop
         
         Args:
-            customer_id (int): ID of the customer
-            items (list): List of tuples (product_id, quantity)
-        
-        Returns:
-            tuple: (success, purchase_id, items_details)
+            adb (AsyncDatabase): Database to run queries on
+            customer_model (Customer): Model (and cache) to share; a new one by default
         """
-        product_model = Product(self.db)
-        total_amount = 0
-        items_details = []
+        self.adb = adb
+        self.model = customer_model or Customer(adb.db)
+    
+    async def get_customer_by_id(self, customer_id):
+        """Get a customer by ID"""
+        customer = self.model.cache.get(('id', customer_id))
+        if customer is not None:
+            return customer
+        return await self.adb.run(self.model.get_customer_by_id, customer_id)
+    
+    async def get_customer_by_email(self, email):
+        """Get a customer by email"""
+        customer = self.model.cache.get(('email', email))
+        if customer is not None:
+            return customer
+        return await self.adb.run(self.model.get_customer_by_email, email)
+    
+    async def get_all_customers(self):
+        """Get all customers"""
+        return await self.adb.run(self.model.get_all_customers)
+    
+    def iter_customers(self, batch_size=1000):
+        """Async generator over all customers ordered by ID; see AsyncDatabase.iter_rows"""
+        query, params = self.model._iter_query()
+        return self.adb.iter_rows(query, params, batch_size=batch_size)
+    
+    async def add_customer(self, name, email=None, phone=None):
+        """Add a new customer and return its ID (None on error)"""
+        return await self.adb.run(self.model.add_customer, name, email, phone)
+    
+    async def bulk_import(self, rows, chunk_size=1000):
+        """Insert many customers, skipping emails that already exist"""
+        return await self.adb.run(self.model.bulk_import, rows, chunk_size)
+
+
+class AsyncPurchase:
+    def __init__(self, adb, product_model=None):
+        """Coroutine versions of the Purchase methods
         
-        # Calculate total and verify quantities
-        for product_id, quantity in items:
-            product = product_model.get_product_by_id(product_id)
-            if not product:
-                print(f"Error: Product #{product_id} not found")
-                return False, None, None
-            
-            if product[3] < quantity:
-                print(f"Error: Insufficient quantity for {product[1]}")
-                return False, None, None
-            
-            item_total = product[2] * quantity
-            total_amount += item_total
-            
-            # Store details for later use
-            items_details.append((product[0], product[1], quantity, product[2]))
+        A checkout's transaction runs entirely on one database thread.
         
-        # Create purchase record
-        query = """
-        INSERT INTO purchases (customer_id, total_amount)
-        VALUES (%s, %s)
+        Args:
+            adb (AsyncDatabase): Database to run queries on
+            product_model (Product): Model whose cache checkouts invalidate
         """
-        params = (customer_id, total_amount)
-        if not self.db.execute_query(query, params):
-            return False, None, None
-        
-        # Get the purchase ID - modified for MySQL
-        self.db.cursor.execute("SELECT LAST_INSERT_ID()")
-        purchase_id = self.db.cursor.fetchone()[0]
-        
-        # Add purchase items
-        for product_id, product_name, quantity, price in items_details:
-            query = """
-            INSERT INTO purchase_items (purchase_id, product_id, quantity, price_per_unit)
-            VALUES (%s, %s, %s, %s)
-            """
-            params = (purchase_id, product_id, quantity, price)
-            if not self.db.execute_query(query, params):
-                print(f"Error adding purchase item for {product_name}")
-            
-            # Update product quantity
-            product_model.update_quantity(product_id, -quantity)
-        
-        return True, purchase_id, items_details
+        self.adb = adb
+        self.model = Purchase(adb.db, product_model)
     
-    def get_purchase_by_id(self, purchase_id):
+    async def create_purchase(self, customer_id, items):
+        """Create a new purchase; returns (success, purchase_id, items_details)"""
+        return await self.adb.run(self.model.create_purchase, customer_id, items)
+    
+    async def get_purchase_by_id(self, purchase_id):
         """Get purchase details by ID"""
-        query = """
-        SELECT p.id, p.customer_id, p.total_amount, p.purchase_date, c.name
-        FROM purchases p
-        LEFT JOIN customers c ON p.customer_id = c.id
-        WHERE p.id = %s
-        """
-        return self.db.fetch_one(query, (purchase_id,))
+        return await self.adb.run(self.model.get_purchase_by_id, purchase_id)
     
-    def get_purchase_items(self, purchase_id):
-        """Get all items in a purchase"""
-        query = """
-        SELECT pi.id, pi.product_id, pi.quantity, pi.price_per_unit, p.name
-        FROM purchase_items pi
-        JOIN products p ON pi.product_id = p.id
-        WHERE pi.purchase_id = %s
-        """
-        return self.db.fetch_all(query, (purchase_id,))
+    async def get_purchase_items(self, purchase_id):
+        """Get items for a purchase"""
+        return await self.adb.run(self.model.get_purchase_items, purchase_id)
     
-    def get_all_purchases(self, limit=50):
-        """Get all purchases"""
-        query = """
-        SELECT p.id, p.customer_id, p.total_amount, p.purchase_date, c.name
-        FROM purchases p
-        LEFT JOIN customers c ON p.customer_id = c.id
-        ORDER BY p.purchase_date DESC
-        LIMIT %s
-        """
-        return self.db.fetch_all(query, (limit,))
+    async def get_all_purchases(self, limit=50):
+        """Get the most recent purchases"""
+        return await self.adb.run(self.model.get_all_purchases, limit)
 
 # Main Application
 class InventoryApp:
@@ -426,16 +2728,25 @@ class InventoryApp:
         # Prompt for database connection settings
         print("\n=== Database Connection Settings ===")
         print("(Press Enter to use defaults)")
-        host = input("MySQL Host [localhost]: ") or "localhost"
-        user = input("MySQL Username [root]: ") or "root"
-        password = input("MySQL Password: ") or ""
-        database = input("Database Name [inventory_management]: ") or "inventory_management"
+        backend = input("Storage backend (mysql/sqlite) [mysql]: ").strip().lower() or "mysql"
+        while backend not in BACKENDS:
+            backend = input("Please enter mysql or sqlite: ").strip().lower()
+        if backend == "sqlite":
+            host, user, password = None, None, None
+            database = input("Database File [inventory_management.db]: ") or "inventory_management.db"
+        else:
+            host = input("MySQL Host [localhost]: ") or "localhost"
+            user = input("MySQL Username [root]: ") or "root"
+            password = input("MySQL Password: ") or ""
+            database = input("Database Name [inventory_management]: ") or "inventory_management"
         
-        self.db = Database(host, user, password, database)
+        self.db = Database(host, user, password, database, backend=backend)
         self.git = GitManager()
+        self.git_writer = GitWriter(self.git)
         self.product_model = Product(self.db)
         self.customer_model = Customer(self.db)
-        self.purchase_model = Purchase(self.db)
+        self.purchase_model = Purchase(self.db, self.product_model)
+        self.reservation_model = Reservation(self.db, self.product_model)
     
     def clear_screen(self):
         """Clear the console screen"""
@@ -458,16 +2769,35 @@ class InventoryApp:
         print("9. Exit")
         print("=" * 50)
     
-    def view_products(self):
-        """View all products"""
-        products = self.product_model.get_all_products()
-        
-        if not products:
-            print("\nNo products found in inventory.")
-            return
-        
+    def view_products(self, page_size=20):
+        """View products one page at a time"""
         headers = ["ID", "Name", "Price", "Quantity", "Category", "Created At", "Updated At"]
-        print("\n" + tabulate(products, headers=headers, tablefmt="grid"))
+        # Last name before each visited page; None is the start of the catalog
+        page_starts = [None]
+        
+        while True:
+            # One extra row tells us whether a next page exists without a COUNT(*)
+            rows = self.product_model.get_products_page(page_starts[-1], page_size + 1)
+            if not rows and len(page_starts) == 1:
+                print("\nNo products found in inventory.")
+                return
+            
+            products = rows[:page_size]
+            has_next = len(rows) > page_size
+            has_previous = len(page_starts) > 1
+            print("\n" + tabulate(products, headers=headers, tablefmt="grid"))
+            
+            if not has_next and not has_previous:
+                return
+            
+            print(f"Page {len(page_starts)}")
+            choice = input("[n]ext page, [p]revious page, Enter to continue: ").strip().lower()
+            if choice == 'n' and has_next:
+                page_starts.append(products[-1][1])
+            elif choice == 'p' and has_previous:
+                page_starts.pop()
+            elif choice == '':
+                return
     
     def add_product(self):
         """Add a new product"""
@@ -492,11 +2822,10 @@ class InventoryApp:
             print("Invalid input. Price must be a number and quantity must be an integer.")
             return
         
-        if self.product_model.add_product(name, price, quantity, category):
-            print(f"\nProduct '{name}' added successfully.")
-            
-            # Record in git
-            self.git.record_inventory_update([(name, 0, quantity)])
+        product_id = self.product_model.add_product(name, price, quantity, category,
+                                                    record=self.git_writer.record_inventory_update)
+        if product_id:
+            print(f"\nProduct '{name}' added successfully. Product ID: {product_id}")
         else:
             print("Failed to add product.")
     
@@ -510,7 +2839,7 @@ class InventoryApp:
             print("Invalid input. ID must be an integer.")
             return
         
-        product = self.product_model.get_product_by_id(product_id)
+        product = self.product_model.get_product_by_id(product_id, use_cache=False)
         if not product:
             print(f"No product found with ID {product_id}.")
             return
@@ -530,15 +2859,9 @@ class InventoryApp:
             print("Invalid input. Price must be a number and quantity must be an integer.")
             return
         
-        old_quantity = product[3]
-        
-        if self.product_model.update_product(product_id, name, price, quantity, category):
+        if self.product_model.update_product(product_id, name, price, quantity, category,
+                                             record=self.git_writer.record_inventory_update):
             print(f"\nProduct #{product_id} updated successfully.")
-            
-            # Record in git if quantity changed
-            if quantity is not None and quantity != old_quantity:
-                product_name = name or product[1]
-                self.git.record_inventory_update([(product_name, old_quantity, quantity)])
         else:
             print("Failed to update product.")
     
@@ -571,8 +2894,9 @@ class InventoryApp:
                 print(f"A customer with email '{email}' already exists.")
                 return
         
-        if self.customer_model.add_customer(name, email, phone):
-            print(f"\nCustomer '{name}' added successfully.")
+        customer_id = self.customer_model.add_customer(name, email, phone)
+        if customer_id:
+            print(f"\nCustomer '{name}' added successfully. Customer ID: {customer_id}")
         else:
             print("Failed to add customer.")
     
@@ -596,10 +2920,10 @@ class InventoryApp:
             print("Invalid input. ID must be an integer.")
             return
         
-        # Add products to purchase
+        # Add products to purchase; each one is held for this cart straight away
         self.view_products()
+        cart_id = uuid.uuid4().hex
         items = []
-        product_details = []
         
         print("\n=== Add Products to Purchase ===")
         print("(Enter 0 for product ID to finish)")
@@ -615,17 +2939,25 @@ class InventoryApp:
                     print(f"No product found with ID {product_id}.")
                     continue
                 
-                quantity = int(input(f"Enter quantity for {product[1]} (available: {product[3]}): "))
+                available = self.reservation_model.available(product_id)
+                quantity = int(input(f"Enter quantity for {product[1]} (available: {available}): "))
                 if quantity <= 0:
                     print("Quantity must be positive.")
                     continue
                 
-                if quantity > product[3]:
-                    print(f"Error: Only {product[3]} units available.")
+                reservation_id = self.reservation_model.reserve(cart_id, product_id, quantity)
+                if reservation_id is None:
+                    print("Could not hold the stock; try again.")
+                    continue
+                if not reservation_id:
+                    available = self.reservation_model.available(product_id)
+                    if available is None:
+                        print(f"No product found with ID {product_id}.")
+                    else:
+                        print(f"Error: Only {available} units available.")
                     continue
                 
                 items.append((product_id, quantity))
-                product_details.append((product[1], quantity, product[2]))
                 print(f"Added {quantity} x {product[1]} to cart.")
             except ValueError:
                 print("Invalid input. ID and quantity must be integers.")
@@ -634,15 +2966,18 @@ class InventoryApp:
             print("Purchase cancelled - no items selected.")
             return
         
-        # Process purchase
-        success, purchase_id, items_details = self.purchase_model.create_purchase(customer_id, items)
+        # Process purchase: the stock is held, so only a lowered quantity can fail it
+        success, purchase_id, items_details = self.reservation_model.checkout(cart_id, customer_id)
         
         if success:
             print(f"\nPurchase completed successfully! Purchase ID: {purchase_id}")
             
             # Record in git
-            self.git.record_purchase(customer_name, product_details)
+            self.git_writer.record_purchase(
+                customer_name, [(name, quantity, price) for product_id, name, quantity, price in items_details])
         else:
+            # Don't keep stock out of sale until the holds expire
+            self.reservation_model.release(cart_id)
             print("Purchase failed.")
     
     def view_purchase_history(self):
@@ -673,6 +3008,15 @@ class InventoryApp:
     
     def view_git_history(self):
         """View purchase history from git"""
+        # Include purchases still waiting in the background writer
+        self.git_writer.flush()
+        stats = self.git_writer.stats()
+        print(f"\nGit writer: {stats['recorded']} recorded, {stats['failed']} failed, "
+              f"average lag {stats['avg_lag']:.2f}s, max lag {stats['max_lag']:.2f}s")
+        commits = self.git.commit_stats()
+        print(f"Git commits: {commits['commits']} for {commits['events']} events "
+              f"(average batch {commits['avg_batch']:.1f}, average commit {commits['avg_commit_time'] * 1000:.0f}ms)")
+        
         history = self.git.get_purchase_history()
         
         if not history:
@@ -680,7 +3024,9 @@ class InventoryApp:
             return
         
         for i, commit in enumerate(history, 1):
-            print(f"\n{i}. {commit}")
+            # The JSON trailer is for tools; show the readable part
+            summary = commit.split(f"\n{self.git.EVENT_TRAILER}")[0].rstrip()
+            print(f"\n{i}. {summary}")
     
     def add_sample_data(self):
         """Add sample data for demonstration"""
@@ -698,10 +3044,10 @@ class InventoryApp:
             ("External HDD", 79.99, 25, "Storage")
         ]
         
-        for name, price, quantity, category in products:
-            if not self.product_model.get_product_by_name(name):
-                self.product_model.add_product(name, price, quantity, category)
-                print(f"Added product: {name}")
+        # Existing products are left untouched; only new ones go into the audit trail
+        stats = self.product_model.bulk_upsert(products, update_existing=False,
+                                               record=self.git_writer.record_inventory_update)
+        print(f"Added {stats['affected']} sample products")
         
         # Add sample customers
         customers = [
@@ -710,55 +3056,893 @@ class InventoryApp:
             ("Bob Johnson", "bob@example.com", "555-9012")
         ]
         
-        for name, email, phone in customers:
-            if not self.customer_model.get_customer_by_email(email):
-                self.customer_model.add_customer(name, email, phone)
-                print(f"Added customer: {name}")
-        
-        # Record in git
-        self.git.record_inventory_update([("Sample Data", 0, 1)])
+        stats = self.customer_model.bulk_import(customers)
+        print(f"Added {stats['inserted']} sample customers")
         print("\nSample data added successfully!")
     
     def run(self):
         """Run the application"""
         print("\nWelcome to the Inventory Management System!")
-        print("Connected to MySQL database")
+        print(f"Connected to {self.db.backend.name} database")
         print("The application will initialize a Git repository for version control.\n")
         
-        # Ask if user wants sample data
-        sample_data = input("Would you like to add sample data for demonstration? (y/n): ")
-        if sample_data.lower() == 'y':
-            self.add_sample_data()
-        
-        while True:
-            self.display_menu()
-            choice = input("\nEnter your choice (1-9): ")
+        try:
+            # Ask if user wants sample data
+            sample_data = input("Would you like to add sample data for demonstration? (y/n): ")
+            if sample_data.lower() == 'y':
+                self.add_sample_data()
             
-            if choice == '1':
-                self.view_products()
-            elif choice == '2':
-                self.add_product()
-            elif choice == '3':
-                self.update_product()
-            elif choice == '4':
-                self.view_customers()
-            elif choice == '5':
-                self.add_customer()
-            elif choice == '6':
-                self.make_purchase()
-            elif choice == '7':
-                self.view_purchase_history()
-            elif choice == '8':
-                self.view_git_history()
-            elif choice == '9':
-                self.db.close()
-                print("\nExiting Inventory Management System. Goodbye!")
-                sys.exit(0)
-            else:
-                print("\nInvalid choice. Please try again.")
+            while True:
+                # The menu shares one connection, so expired holds are swept here
+                # rather than on a thread that would interleave with its transactions
+                self.reservation_model.sweep()
+                self.display_menu()
+                choice = input("\nEnter your choice (1-9): ")
+                
+                if choice == '1':
+                    self.view_products()
+                elif choice == '2':
+                    self.add_product()
+                elif choice == '3':
+                    self.update_product()
+                elif choice == '4':
+                    self.view_customers()
+                elif choice == '5':
+                    self.add_customer()
+                elif choice == '6':
+                    self.make_purchase()
+                elif choice == '7':
+                    self.view_purchase_history()
+                elif choice == '8':
+                    self.view_git_history()
+                elif choice == '9':
+                    break
+                else:
+                    print("\nInvalid choice. Please try again.")
+                
+                input("\nPress Enter to continue...")
+        except (KeyboardInterrupt, EOFError):
+            print()
+        finally:
+            # Queued events would be lost with the writer's daemon thread
+            print("\nSaving pending git history...")
+            self.git_writer.close()
+            self.db.close()
+        print("\nExiting Inventory Management System. Goodbye!")
+
+# HTTP API
+PRODUCT_FIELDS = ["id", "name", "price", "quantity", "category", "created_at", "updated_at"]
+CUSTOMER_FIELDS = ["id", "name", "email", "phone", "created_at"]
+PURCHASE_FIELDS = ["id", "customer_id", "total_amount", "purchase_date", "customer_name"]
+PURCHASE_ITEM_FIELDS = ["id", "product_id", "quantity", "price_per_unit", "product_name"]
+CART_FIELDS = ["product_id", "product_name", "quantity", "price_per_unit", "expires_at"]
+
+
+class ApiError(Exception):
+    """A request that can't be served, with the HTTP status to answer"""
+    def __init__(self, status, message, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+def _json_value(value):
+    """json.dumps fallback for DECIMAL and DATETIME columns"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return float(value)
+
+
+def _record(fields, row):
+    """A row as a dict keyed by column name (None stays None)"""
+    return dict(zip(fields, row)) if row is not None else None
+
+
+def _field(body, name, kind, required=False, default=None):
+    """Read and convert one field of a JSON request body, default if it is missing"""
+    value = body.get(name)
+    if value is None:
+        if required:
+            raise ApiError(400, f"'{name}' is required")
+        return default
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{name}' must be {kind.__name__}")
+
+
+def _limit(query, default=50, maximum=1000):
+    """Read the ?limit= of a listing, capped at maximum"""
+    limit = _field(query, "limit", int, default=default)
+    if limit < 1:
+        raise ApiError(400, "'limit' must be positive")
+    return min(limit, maximum)
+
+
+class InventoryService:
+    def __init__(self, db, git_writer, hold_seconds=900):
+        """Product, customer, cart and purchase operations as JSON endpoints
+        
+        One instance is shared by every request thread: queries borrow
+        connections from db's pool and git events go through the single
+        git_writer, so terminals never race on the working tree.
+        
+        Args:
+            db (Database): Pooled database
+            git_writer (GitWriter): Writer that records stock changes and purchases
+            hold_seconds (float): How long an idle cart keeps its stock
+        """
+        self.db = db
+        self.git_writer = git_writer
+        self.product_model = Product(db)
+        self.customer_model = Customer(db)
+        self.purchase_model = Purchase(db, self.product_model)
+        self.reservation_model = Reservation(db, self.product_model, hold_seconds)
+        self.routes = [
+            ("GET", re.compile(r"/products"), self.list_products),
+            ("POST", re.compile(r"/products"), self.add_product),
+            ("GET", re.compile(r"/products/(\d+)"), self.get_product),
+            ("PATCH", re.compile(r"/products/(\d+)"), self.update_product),
+            ("POST", re.compile(r"/customers"), self.add_customer),
+            ("GET", re.compile(r"/customers/(\d+)"), self.get_customer),
+            ("GET", re.compile(r"/purchases"), self.list_purchases),
+            ("POST", re.compile(r"/purchases"), self.create_purchase),
+            ("GET", re.compile(r"/purchases/(\d+)"), self.get_purchase),
+            ("POST", re.compile(r"/carts"), self.create_cart),
+            ("GET", re.compile(r"/carts/([\w-]{1,64})"), self.get_cart),
+            ("DELETE", re.compile(r"/carts/([\w-]{1,64})"), self.release_cart),
+            ("POST", re.compile(r"/carts/([\w-]{1,64})/items"), self.reserve_item),
+            ("DELETE", re.compile(r"/carts/([\w-]{1,64})/items/(\d+)"), self.release_item),
+            ("POST", re.compile(r"/carts/([\w-]{1,64})/checkout"), self.checkout_cart),
+            ("GET", re.compile(r"/stats"), self.stats),
+        ]
+    
+    def dispatch(self, method, path, query, body):
+        """Route one request
+        
+        Args:
+            method (str): HTTP method
+            path (str): URL path without the query string
+            query (dict): Query parameters, one value each
+            body (dict): Parsed JSON body ({} when there is none)
+        
+        Returns:
+            tuple: (status, JSON-serializable payload)
+        """
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path.rstrip("/") or "/")
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            args = [int(group) if group.isdigit() else group for group in match.groups()]
+            try:
+                return handler(*args, query=query, body=body)
+            except self.db.errors as e:
+                raise ApiError(503, f"Database unavailable: {e}")
+        if allowed:
+            raise ApiError(405, f"{method} not allowed on {path}")
+        raise ApiError(404, f"No such resource: {path}")
+    
+    def list_products(self, query, body):
+        """GET /products?after=<name>&limit=<n>[&category=<c>]"""
+        limit = _limit(query)
+        rows = self.product_model.get_products_page(query.get("after"), limit + 1, query.get("category"))
+        products = [_record(PRODUCT_FIELDS, row) for row in rows[:limit]]
+        # Pass next as after= to get the following page
+        next_after = products[-1]['name'] if len(rows) > limit else None
+        return 200, {'products': products, 'next': next_after}
+    
+    def get_product(self, product_id, query, body):
+        """GET /products/<id>"""
+        product = self.product_model.get_product_by_id(product_id)
+        if not product:
+            raise ApiError(404, f"No product found with ID {product_id}")
+        return 200, _record(PRODUCT_FIELDS, product)
+    
+    def add_product(self, query, body):
+        """POST /products {name, price, quantity, category}"""
+        name = _field(body, "name", str, required=True)
+        price = _field(body, "price", float, required=True)
+        quantity = _field(body, "quantity", int, required=True)
+        category = _field(body, "category", str)
+        
+        existing = self.product_model.get_product_by_name(name)
+        if existing:
+            raise ApiError(409, f"A product with name '{name}' already exists", id=existing[0])
+        product_id = self.product_model.add_product(name, price, quantity, category,
+                                                    record=self.git_writer.record_inventory_update)
+        if not product_id:
+            raise ApiError(500, "Failed to add product")
+        return 201, _record(PRODUCT_FIELDS, self.product_model.get_product_by_id(product_id))
+    
+    def update_product(self, product_id, query, body):
+        """PATCH /products/<id> with any of name, price, quantity, category"""
+        name = _field(body, "name", str)
+        price = _field(body, "price", float)
+        quantity = _field(body, "quantity", int)
+        category = _field(body, "category", str)
+        
+        if not self.product_model.get_product_by_id(product_id):
+            raise ApiError(404, f"No product found with ID {product_id}")
+        if not self.product_model.update_product(product_id, name, price, quantity, category,
+                                                 record=self.git_writer.record_inventory_update):
+            raise ApiError(500, "Failed to update product")
+        return 200, _record(PRODUCT_FIELDS, self.product_model.get_product_by_id(product_id, use_cache=False))
+    
+    def get_customer(self, customer_id, query, body):
+        """GET /customers/<id>"""
+        customer = self.customer_model.get_customer_by_id(customer_id)
+        if not customer:
+            raise ApiError(404, f"No customer found with ID {customer_id}")
+        return 200, _record(CUSTOMER_FIELDS, customer)
+    
+    def add_customer(self, query, body):
+        """POST /customers {name, email, phone}"""
+        name = _field(body, "name", str, required=True)
+        email = _field(body, "email", str)
+        phone = _field(body, "phone", str)
+        
+        if email:
+            existing = self.customer_model.get_customer_by_email(email)
+            if existing:
+                raise ApiError(409, f"A customer with email '{email}' already exists", id=existing[0])
+        customer_id = self.customer_model.add_customer(name, email, phone)
+        if not customer_id:
+            raise ApiError(500, "Failed to add customer")
+        return 201, _record(CUSTOMER_FIELDS, self.customer_model.get_customer_by_id(customer_id))
+    
+    def list_purchases(self, query, body):
+        """GET /purchases?limit=<n>, newest first"""
+        limit = _limit(query)
+        purchases = self.purchase_model.get_all_purchases(limit)
+        return 200, {'purchases': [_record(PURCHASE_FIELDS, row) for row in purchases]}
+    
+    def get_purchase(self, purchase_id, query, body):
+        """GET /purchases/<id>, with its items"""
+        purchase = self.purchase_model.get_purchase_by_id(purchase_id)
+        if not purchase:
+            raise ApiError(404, f"No purchase found with ID {purchase_id}")
+        result = _record(PURCHASE_FIELDS, purchase)
+        result['items'] = [_record(PURCHASE_ITEM_FIELDS, row)
+                           for row in self.purchase_model.get_purchase_items(purchase_id)]
+        return 200, result
+    
+    def create_purchase(self, query, body):
+        """POST /purchases {customer_id, items: [{product_id, quantity}, ...]}"""
+        customer_id = _field(body, "customer_id", int)
+        items = body.get("items")
+        if not isinstance(items, list) or not items:
+            raise ApiError(400, "'items' must be a non-empty list")
+        basket = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise ApiError(400, "each item needs product_id and quantity")
+            quantity = _field(item, "quantity", int, default=1)
+            if quantity <= 0:
+                raise ApiError(400, "'quantity' must be positive")
+            basket.append((_field(item, "product_id", int, required=True), quantity))
+        
+        customer_name = self._customer_name(customer_id)
+        success, purchase_id, items_details = self.purchase_model.create_purchase(customer_id or None, basket)
+        if not success:
+            raise ApiError(409, "Purchase failed: unknown product or insufficient stock")
+        return 201, self._purchase_result(purchase_id, customer_id, customer_name, items_details)
+    
+    def _customer_name(self, customer_id):
+        """Name recorded in git for a purchase by customer_id (0 or None: anonymous)"""
+        if not customer_id:
+            return "Anonymous"
+        customer = self.customer_model.get_customer_by_id(customer_id)
+        if not customer:
+            raise ApiError(404, f"No customer found with ID {customer_id}")
+        return customer[1]
+    
+    def _purchase_result(self, purchase_id, customer_id, customer_name, items_details):
+        """Record a completed purchase in git and describe it for the response"""
+        self.git_writer.record_purchase(
+            customer_name, [(name, quantity, price) for product_id, name, quantity, price in items_details])
+        return {
+            'id': purchase_id,
+            'customer_id': customer_id or None,
+            'total_amount': sum(quantity * price for product_id, name, quantity, price in items_details),
+            'items': [{'product_id': product_id, 'product_name': name, 'quantity': quantity, 'price_per_unit': price}
+                      for product_id, name, quantity, price in items_details],
+        }
+    
+    def create_cart(self, query, body):
+        """POST /carts: a new, empty cart ID"""
+        return 201, {'cart_id': uuid.uuid4().hex}
+    
+    def get_cart(self, cart_id, query, body):
+        """GET /carts/<cart_id>: the cart's live holds"""
+        items = [_record(CART_FIELDS, row) for row in self.reservation_model.get_cart(str(cart_id))]
+        return 200, {
+            'cart_id': str(cart_id),
+            'items': items,
+            'total_amount': sum(item['quantity'] * item['price_per_unit'] for item in items),
+        }
+    
+    def reserve_item(self, cart_id, query, body):
+        """POST /carts/<cart_id>/items {product_id, quantity}: hold stock for the cart"""
+        product_id = _field(body, "product_id", int, required=True)
+        quantity = _field(body, "quantity", int, default=1)
+        if quantity <= 0:
+            raise ApiError(400, "'quantity' must be positive")
+        reservation_id = self.reservation_model.reserve(str(cart_id), product_id, quantity)
+        if reservation_id is None:
+            raise ApiError(503, "Could not reserve the stock")
+        if not reservation_id:
+            product = self.product_model.get_product_by_id(product_id)
+            available = self.reservation_model.available(product_id)
+            if not product or available is None:
+                raise ApiError(404, f"No product found with ID {product_id}")
+            raise ApiError(409, f"Only {available} units of {product[1]} available", available=available)
+        status, cart = self.get_cart(cart_id, query, body)
+        return 201, cart
+    
+    def release_item(self, cart_id, product_id, query, body):
+        """DELETE /carts/<cart_id>/items/<product_id>: give one product's holds back"""
+        if self.reservation_model.release(str(cart_id), product_id) is None:
+            raise ApiError(503, "Could not release the holds")
+        return self.get_cart(cart_id, query, body)
+    
+    def release_cart(self, cart_id, query, body):
+        """DELETE /carts/<cart_id>: abandon the cart, returning its stock"""
+        released = self.reservation_model.release(str(cart_id))
+        if released is None:
+            raise ApiError(503, "Could not release the holds")
+        return 200, {'cart_id': str(cart_id), 'released': released}
+    
+    def checkout_cart(self, cart_id, query, body):
+        """POST /carts/<cart_id>/checkout {customer_id}: buy everything the cart holds"""
+        customer_id = _field(body, "customer_id", int)
+        customer_name = self._customer_name(customer_id)
+        success, purchase_id, items_details = self.reservation_model.checkout(str(cart_id), customer_id or None)
+        if not success:
+            raise ApiError(409, "Cart is empty, its holds have expired or the stock was lowered below them")
+        return 201, self._purchase_result(purchase_id, customer_id, customer_name, items_details)
+    
+    def stats(self, query, body):
+        """GET /stats: pool, cache and git writer counters"""
+        return 200, {
+            'pool': self.db.pool_stats(),
+            'product_cache': self.product_model.cache_stats(),
+            'customer_cache': self.customer_model.cache_stats(),
+            'git_writer': self.git_writer.stats(),
+        }
+
+
+def make_api_server(service, host="127.0.0.1", port=8080, access_log=False):
+    """Build a threaded HTTP server answering requests with service
+    
+    Each connection gets its own thread; HTTP/1.1 keep-alive lets a client
+    reuse one connection for many requests.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qsl, urlsplit
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; with Nagle on, every
+        # keep-alive response after the first would wait for a delayed ACK
+        disable_nagle_algorithm = True
+        
+        def read_body(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+            except ValueError as e:
+                raise ApiError(400, f"Invalid JSON: {e}")
+            if not isinstance(body, dict):
+                raise ApiError(400, "Request body must be a JSON object")
+            return body
+        
+        def handle_request(self):
+            url = urlsplit(self.path)
+            try:
+                body = self.read_body()
+                status, payload = service.dispatch(self.command, url.path, dict(parse_qsl(url.query)), body)
+            except ApiError as e:
+                status, payload = e.status, dict(e.details, error=str(e))
+            except Exception as e:
+                status, payload = 500, {'error': f"Internal error: {e}"}
             
-            input("\nPress Enter to continue...")
+            data = json.dumps(payload, default=_json_value).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = handle_request
+        
+        def log_request(self, code="-", size="-"):
+            if access_log:
+                super().log_request(code, size)
+    
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+def read_env(path=".env"):
+    """Read KEY=VALUE pairs from a .env file (none if it doesn't exist)"""
+    settings = {}
+    if os.path.exists(path):
+        with open(path) as env_file:
+            for line in env_file:
+                key, sep, value = line.strip().partition("=")
+                if sep and not key.startswith("#"):
+                    settings[key.strip()] = value.strip()
+    return settings
+
+def open_database(args, **options):
+    """Connect with the command's connection settings (None if that fails)
+    
+    options are passed on to Database, e.g. pool_max_size.
+    """
+    db = Database(args.host, args.user, args.password, args.database, backend=args.backend, **options)
+    if db.connection is None and db.pool is None:
+        return None
+    return db
+
+def list_products(args):
+    """Print the catalog, optionally one category"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    try:
+        products = list(Product(db).iter_products(category=args.category))
+    finally:
+        db.close()
+    
+    if not products:
+        print("\nNo products found in inventory.")
+        return 0
+    headers = ["ID", "Name", "Price", "Quantity", "Category", "Created At", "Updated At"]
+    print("\n" + tabulate(products, headers=headers, tablefmt="grid"))
+    return 0
+
+def add_product(args):
+    """Add one product and record its stock in git"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    try:
+        product_model = Product(db)
+        if product_model.get_product_by_name(args.name):
+            print(f"A product with name '{args.name}' already exists.")
+            return 1
+        product_id = product_model.add_product(args.name, args.price, args.quantity, args.category,
+                                               record=GitManager(args.repo).record_inventory_update)
+    finally:
+        db.close()
+    
+    if not product_id:
+        print("Failed to add product.")
+        return 1
+    print(f"Product '{args.name}' added successfully. Product ID: {product_id}")
+    return 0
+
+def update_product(args):
+    """Change the given fields of one product, recording quantity changes in git"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    try:
+        product_model = Product(db)
+        if not product_model.get_product_by_id(args.id):
+            print(f"No product found with ID {args.id}.")
+            return 1
+        updated = product_model.update_product(args.id, args.name, args.price, args.quantity, args.category,
+                                               record=GitManager(args.repo).record_inventory_update)
+    finally:
+        db.close()
+    
+    if not updated:
+        print("Failed to update product.")
+        return 1
+    print(f"Product #{args.id} updated successfully.")
+    return 0
+
+def add_customer(args):
+    """Add one customer"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    try:
+        customer_model = Customer(db)
+        if args.email and customer_model.get_customer_by_email(args.email):
+            print(f"A customer with email '{args.email}' already exists.")
+            return 1
+        customer_id = customer_model.add_customer(args.name, args.email, args.phone)
+    finally:
+        db.close()
+    
+    if not customer_id:
+        print("Failed to add customer.")
+        return 1
+    print(f"Customer '{args.name}' added successfully. Customer ID: {customer_id}")
+    return 0
+
+def purchase_item(value):
+    """argparse type for PRODUCT_ID:QUANTITY"""
+    import argparse
+    
+    product_id, sep, quantity = value.partition(":")
+    try:
+        item = (int(product_id), int(quantity) if sep else 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected PRODUCT_ID[:QUANTITY], got '{value}'")
+    if item[1] <= 0:
+        raise argparse.ArgumentTypeError(f"quantity must be positive in '{value}'")
+    return item
+
+def make_purchase(args):
+    """Check out one basket and record it in git"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    try:
+        customer_name = "Anonymous"
+        if args.customer:
+            customer = Customer(db).get_customer_by_id(args.customer)
+            if not customer:
+                print(f"No customer found with ID {args.customer}.")
+                return 1
+            customer_name = customer[1]
+        success, purchase_id, items_details = Purchase(db).create_purchase(args.customer or None, args.items)
+    finally:
+        db.close()
+    
+    if not success:
+        print("Purchase failed.")
+        return 1
+    print(f"Purchase completed successfully! Purchase ID: {purchase_id}")
+    GitManager(args.repo).record_purchase(
+        customer_name, [(name, quantity, price) for product_id, name, quantity, price in items_details])
+    return 0
+
+def show_history(args):
+    """Print recent purchases from the database or git, or the items of one purchase"""
+    if args.git:
+        git_manager = GitManager(args.repo)
+        history = git_manager.get_purchase_history(args.limit)
+        if not history:
+            print("\nNo git purchase history found.")
+        for i, commit in enumerate(history, 1):
+            summary = commit.split(f"\n{git_manager.EVENT_TRAILER}")[0].rstrip()
+            print(f"\n{i}. {summary}")
+        return 0
+    
+    db = open_database(args)
+    if db is None:
+        return 1
+    try:
+        purchase_model = Purchase(db)
+        if args.purchase:
+            rows = purchase_model.get_purchase_items(args.purchase)
+            headers = ["ID", "Product ID", "Quantity", "Price Per Unit", "Product Name"]
+        else:
+            rows = purchase_model.get_all_purchases(args.limit)
+            headers = ["ID", "Customer ID", "Total Amount", "Purchase Date", "Customer Name"]
+    finally:
+        db.close()
+    
+    if not rows:
+        print("\nNo purchase history found.")
+        return 0
+    print("\n" + tabulate(rows, headers=headers, tablefmt="grid"))
+    return 0
+
+def serve(args):
+    """Run the HTTP JSON API until interrupted"""
+    db = open_database(args, pool_min_size=min(2, args.pool_size), pool_max_size=args.pool_size)
+    if db is None:
+        return 1
+    # Group commits keep git from limiting checkout throughput
+    git_writer = GitWriter(GitManager(args.repo, group_size=args.group_size, group_window=args.group_window))
+    service = InventoryService(db, git_writer, args.hold_seconds)
+    sweeper = ReservationSweeper(service.reservation_model, args.sweep_interval)
+    server = make_api_server(service, args.bind, args.port, args.access_log)
+    print(f"Serving the inventory API on http://{args.bind}:{server.server_address[1]} (Ctrl+C to stop)")
+    
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    
+    # Containers and service managers stop processes with SIGTERM
+    import signal
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        sweeper.close()
+        git_writer.close()
+        db.close()
+    return 0
+
+def sweep_reservations(args):
+    """Release every expired cart hold"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    reservation_model = Reservation(db)
+    total = 0
+    try:
+        while True:
+            released = reservation_model.sweep()
+            if released is None:
+                return 1
+            total += released
+            if released < 1000:
+                break
+    finally:
+        db.close()
+    print(f"Released {total} expired holds")
+    return 0
+
+def reconcile_inventory(product_model, git_manager, use_checkpoint=True):
+    """Compare product quantities in the database with those replayed from git
+    
+    Replays only commits after the last verified checkpoint when there is
+    one, and saves a new checkpoint when everything matches.
+    
+    Args:
+        product_model (Product): Source of current quantities
+        git_manager (GitManager): Source of the event history
+        use_checkpoint (bool): Resume from and update the checkpoint
+    
+    Returns:
+        dict: mismatched (name, expected, actual), missing (in history but not the
+            database), untracked (in the database but not the history),
+            events replayed, sha and whether a checkpoint was used
+    """
+    start, quantities = git_manager.load_checkpoint() if use_checkpoint else (None, None)
+    expected, sha, replayed = git_manager.replay_inventory(start, quantities)
+    
+    report = {'mismatched': [], 'missing': [], 'untracked': [], 'events': replayed,
+              'sha': sha, 'resumed_from': start}
+    seen = set()
+    for product in product_model.iter_products():
+        name, quantity = product[1], product[3]
+        seen.add(name)
+        if name not in expected:
+            report['untracked'].append(name)
+        elif expected[name] != quantity:
+            report['mismatched'].append((name, expected[name], quantity))
+    report['missing'] = sorted(name for name in expected if name not in seen)
+    
+    if use_checkpoint and sha and not (report['mismatched'] or report['missing'] or report['untracked']):
+        git_manager.save_checkpoint(sha, expected)
+    return report
+
+def reconcile(args):
+    """Check database stock against the git audit trail"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    try:
+        report = reconcile_inventory(Product(db), GitManager(args.repo), use_checkpoint=not args.full)
+    finally:
+        db.close()
+    
+    since = f" since checkpoint {report['resumed_from'][:10]}" if report['resumed_from'] else ""
+    print(f"\nReplayed {report['events']} events{since}")
+    if report['mismatched']:
+        print("\n" + tabulate(report['mismatched'], headers=["Product", "Expected (git)", "Actual (database)"],
+                              tablefmt="grid"))
+    if report['missing']:
+        print("\nIn git history but not in the database: " + ", ".join(report['missing']))
+    if report['untracked']:
+        print("\nIn the database but not in git history: " + ", ".join(report['untracked']))
+    
+    if report['mismatched'] or report['missing'] or report['untracked']:
+        return 1
+    print("Inventory matches git history")
+    return 0
+
+def import_products(args):
+    """Bulk load products from a CSV or JSONL file"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    
+    def report(stats):
+        print(f"{stats['rows']} rows read, {stats['written']} written, {stats['failed']} failed "
+              f"({stats['rows_per_second']:.0f} rows/s)")
+    
+    try:
+        stats = Product(db).bulk_upsert(
+            read_product_file(args.file, args.format),
+            chunk_size=args.chunk_size,
+            update_existing=not args.no_update,
+            progress=report,
+            record=GitManager(args.repo).record_inventory_update
+        )
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error reading {args.file}: {e}")
+        return 1
+    finally:
+        db.close()
+    
+    print(f"\nImported {stats['written']} of {stats['rows']} products in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:.0f} rows/s, {stats['failed']} failed)")
+    return 0 if not stats['failed'] else 1
+
+def import_customers(args):
+    """Bulk load customers from a CSV or JSONL file, skipping known emails"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    
+    def report(stats):
+        print(f"{stats['rows']} rows read, {stats['inserted']} inserted, {stats['skipped']} skipped, "
+              f"{stats['failed']} failed ({stats['rows_per_second']:.0f} rows/s)")
+    
+    try:
+        stats = Customer(db).bulk_import(
+            read_customer_file(args.file, args.format),
+            chunk_size=args.chunk_size,
+            progress=report
+        )
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Error reading {args.file}: {e}")
+        return 1
+    finally:
+        db.close()
+    
+    print(f"\nImported {stats['rows']} customers in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:.0f} rows/s): {stats['inserted']} inserted, "
+          f"{stats['skipped']} skipped, {stats['failed']} failed")
+    return 0 if not stats['failed'] else 1
+
+# Columns written by the export command for each table
+EXPORTS = {
+    'products': (Product, 'iter_products',
+                 ["id", "name", "price", "quantity", "category", "created_at", "updated_at"]),
+    'customers': (Customer, 'iter_customers',
+                  ["id", "name", "email", "phone", "created_at"]),
+    'purchase-items': (Purchase, 'iter_purchase_items',
+                       ["id", "purchase_id", "purchase_date", "product_id", "product_name",
+                        "quantity", "price_per_unit"]),
+}
+
+def export_table(args):
+    """Stream a table to CSV in constant memory"""
+    db = open_database(args)
+    if db is None:
+        return 1
+    
+    model_class, method, headers = EXPORTS[args.table]
+    rows = getattr(model_class(db), method)(batch_size=args.batch_size)
+    count = 0
+    try:
+        with open(args.output, "w", newline="", encoding="utf-8") as output:
+            writer = csv.writer(output)
+            writer.writerow(headers)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    except OSError as e:
+        print(f"Error writing {args.output}: {e}")
+        return 1
+    finally:
+        rows.close()
+        db.close()
+    
+    print(f"Exported {count} {args.table} rows to {args.output}")
+    return 0
+
+def main(argv=None):
+    """Run the interactive menu, or a single command if one is given"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Inventory Management System")
+    subparsers = parser.add_subparsers(dest="command")
+    commands = []
+    
+    def command(subparsers, name, handler, **kwargs):
+        subparser = subparsers.add_parser(name, **kwargs)
+        subparser.set_defaults(handler=handler)
+        commands.append(subparser)
+        return subparser
+    
+    products = subparsers.add_parser("products", help="list, add or update products")
+    product_commands = products.add_subparsers(dest="action", required=True)
+    product_lister = command(product_commands, "list", list_products, help="print the catalog")
+    product_lister.add_argument("--category", help="only products in this category")
+    product_adder = command(product_commands, "add", add_product, help="add a product")
+    product_adder.add_argument("name")
+    product_adder.add_argument("--price", type=float, required=True)
+    product_adder.add_argument("--quantity", type=int, required=True)
+    product_adder.add_argument("--category")
+    product_updater = command(product_commands, "update", update_product, help="change fields of a product")
+    product_updater.add_argument("id", type=int)
+    product_updater.add_argument("--name")
+    product_updater.add_argument("--price", type=float)
+    product_updater.add_argument("--quantity", type=int)
+    product_updater.add_argument("--category")
+    
+    customers = subparsers.add_parser("customers", help="add customers")
+    customer_commands = customers.add_subparsers(dest="action", required=True)
+    customer_adder = command(customer_commands, "add", add_customer, help="add a customer")
+    customer_adder.add_argument("name")
+    customer_adder.add_argument("--email")
+    customer_adder.add_argument("--phone")
+    
+    purchaser = command(subparsers, "purchase", make_purchase, help="check out one basket")
+    purchaser.add_argument("items", nargs="+", type=purchase_item, metavar="PRODUCT_ID[:QUANTITY]")
+    purchaser.add_argument("--customer", type=int, default=0, help="customer ID (default: anonymous)")
+    
+    historian = command(subparsers, "history", show_history, help="print recent purchases")
+    historian.add_argument("--limit", type=int, default=50)
+    historian.add_argument("--purchase", type=int, help="print the items of this purchase instead")
+    historian.add_argument("--git", action="store_true", help="read the audit trail in git instead of the database")
+    
+    server = command(subparsers, "serve", serve, help="run the HTTP JSON API for store terminals")
+    server.add_argument("--bind", default="127.0.0.1", help="address to listen on")
+    server.add_argument("--port", type=int, default=8080)
+    server.add_argument("--pool-size", type=int, default=10, help="maximum database connections")
+    server.add_argument("--group-size", type=int, default=100, help="events per git commit at most")
+    server.add_argument("--group-window", type=float, default=1.0, help="seconds an event may wait for its commit")
+    server.add_argument("--hold-seconds", type=float, default=900, help="how long an idle cart keeps its stock")
+    server.add_argument("--sweep-interval", type=float, default=30, help="seconds between releases of expired holds")
+    server.add_argument("--access-log", action="store_true", help="log every request to stderr")
+    
+    command(subparsers, "sweep", sweep_reservations, help="delete holds of expired carts")
+    
+    for subparser in (product_adder, product_updater, purchaser, historian, server):
+        subparser.add_argument("--repo", default=".", help="git repository holding the audit trail")
+    
+    product_importer = command(subparsers, "import-products", import_products,
+                               help="bulk load products from a CSV or JSONL file")
+    product_importer.add_argument("file", help="CSV (with header) or JSONL file with name, price, quantity, category")
+    product_importer.add_argument("--no-update", action="store_true", help="leave existing products unchanged")
+    
+    customer_importer = command(subparsers, "import-customers", import_customers,
+                                help="bulk load customers from a CSV or JSONL file")
+    customer_importer.add_argument("file", help="CSV (with header) or JSONL file with name, email, phone")
+    
+    for importer in (product_importer, customer_importer):
+        importer.add_argument("--format", choices=["csv", "jsonl"], help="file format (default: from extension)")
+        importer.add_argument("--chunk-size", type=int, default=1000, help="rows per batch and commit")
+    product_importer.add_argument("--repo", default=".", help="git repository holding the audit trail")
+    
+    reconciler = command(subparsers, "reconcile", reconcile, help="check stock in the database against git history")
+    reconciler.add_argument("--full", action="store_true", help="replay all history instead of resuming from the last checkpoint")
+    reconciler.add_argument("--repo", default=".", help="git repository holding the audit trail")
+    
+    exporter = command(subparsers, "export", export_table, help="stream a table to CSV")
+    exporter.add_argument("table", choices=sorted(EXPORTS))
+    exporter.add_argument("output", help="CSV file to write")
+    exporter.add_argument("--batch-size", type=int, default=1000, help="rows fetched per round trip")
+    
+    # Connection settings come from the DB_* keys in .env unless given as flags
+    env = read_env()
+    for subparser in commands:
+        subparser.add_argument("--host", default=env.get("DB_HOST", "localhost"))
+        subparser.add_argument("--user", default=env.get("DB_USER", "root"))
+        subparser.add_argument("--password", default=env.get("DB_PASSWORD", ""))
+        subparser.add_argument("--database", default=env.get("DB_NAME", "inventory_management"),
+                               help="database name, or the database file with --backend sqlite")
+        subparser.add_argument("--backend", choices=sorted(BACKENDS), default=env.get("DB_BACKEND", "mysql"))
+    
+    args = parser.parse_args(argv)
+    try:
+        if args.command:
+            return args.handler(args)
+        
+        app = InventoryApp()
+        app.run()
+        return 0
+    except MissingDependencyError as e:
+        print(f"Error: {e}")
+        return 1
 
 if __name__ == "__main__":
-    app = InventoryApp()
-    app.run() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file